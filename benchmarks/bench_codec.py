@@ -0,0 +1,68 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Compare domestique.codec against the previous digit-by-digit divmod loop
+for 128-bit and multi-kilobyte values.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_codec
+"""
+
+import os
+import timeit
+
+from domestique.codec import BASE62, encode_int, decode_int
+
+
+def _digit_loop_encode(number, alphabet=BASE62):
+
+    base = len(alphabet)
+    out = []
+    while number:
+        number, rem = divmod(number, base)
+        out.append(alphabet[rem])
+    out.reverse()
+    return "".join(out) or alphabet[0]
+
+
+def _digit_loop_decode(text, alphabet=BASE62):
+
+    number = 0
+    for c in text:
+        number = number * len(alphabet) + alphabet.index(c)
+    return number
+
+
+def _time(func, number):
+
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+
+    for label, size, number in (("128-bit", 16, 20_000), ("4 KB", 4096, 20), ("16 KB", 16384, 3)):
+        value = int.from_bytes(os.urandom(size), "big")
+        text = encode_int(value)
+        assert _digit_loop_encode(value) == text and decode_int(text) == value
+
+        print(f"{label:<8} encode: digit loop {_time(lambda: _digit_loop_encode(value), number):>12,.1f} us"
+              f"  codec {_time(lambda: encode_int(value), number):>12,.1f} us")
+        print(f"{label:<8} decode: digit loop {_time(lambda: _digit_loop_decode(text), number):>12,.1f} us"
+              f"  codec {_time(lambda: decode_int(text), number):>12,.1f} us")
+
+
+if __name__ == "__main__":
+    main()
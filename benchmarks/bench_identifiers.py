@@ -0,0 +1,55 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Compare IDs per second for the per-call and batch identifier APIs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_identifiers
+"""
+
+import time
+
+from domestique.identifiers import (
+    generate_id,
+    generate_ids,
+    generate_shorter_id,
+    generate_shorter_ids,
+)
+
+
+N = 200_000
+
+
+def _rate(label, func):
+
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<44} {N / elapsed:>12,.0f} ids/s")
+
+
+def main():
+
+    _rate("generate_id() per call", lambda: [generate_id() for _ in range(N)])
+    _rate("generate_ids(n)", lambda: generate_ids(N))
+    _rate("generate_shorter_id() per call", lambda: [generate_shorter_id() for _ in range(N)])
+    _rate("generate_shorter_ids(n)", lambda: generate_shorter_ids(N))
+    _rate("generate_shorter_id(lowercase=True) per call", lambda: [generate_shorter_id(lowercase=True) for _ in range(N)])
+    _rate("generate_shorter_ids(n, lowercase=True)", lambda: generate_shorter_ids(N, lowercase=True))
+
+
+if __name__ == "__main__":
+    main()
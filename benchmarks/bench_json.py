@@ -0,0 +1,63 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Compare the tiered JSON parser backends on realistic payload sizes. The
+json5 column is the previous behaviour; it takes a minute or so in total.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_json
+"""
+
+import json
+import timeit
+
+from domestique.json import JSON_BACKENDS, loads, orjson
+
+
+def _payload(records):
+
+    return json.dumps([
+        {
+            "id": f"rec-{i:06d}",
+            "name": f"Record number {i}",
+            "active": i % 3 == 0,
+            "score": i * 1.5,
+            "tags": ["alpha", "beta", "gamma"],
+            "owner": {"client_id": "acme", "email": f"user{i}@example.com"},
+        }
+        for i in range(records)
+    ])
+
+
+def _time_ms(func, number):
+
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000
+
+
+def main():
+
+    for records, number in ((5, 100), (500, 2), (2000, 1)):
+        text = _payload(records)
+        results = []
+        for backend in JSON_BACKENDS:
+            if backend == "orjson" and orjson is None:
+                continue
+            results.append(f"{backend} {_time_ms(lambda: loads(text, backend), number):.3f} ms")
+        print(f"{len(text) / 1024:>8.1f} KB  " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    main()
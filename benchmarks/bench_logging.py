@@ -0,0 +1,141 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Microbenchmarks for domestique.logging helpers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_logging
+"""
+
+import inspect
+import io
+import logging
+import timeit
+import traceback
+
+from domestique.identifiers import generate_shorter_id
+from domestique.logging import get_calling_method_text, log_exception
+
+
+def _inspect_stack_calling_method_text(depth=2):
+
+    # Previous implementation, kept here for comparison
+    stack = inspect.stack()
+    caller_info = stack[depth]
+    return f"{caller_info.frame.f_globals['__name__']}.{caller_info.function}"
+
+
+def _nested(func, levels):
+
+    # Simulate a handler called some way down a framework's call stack
+    if levels:
+        return _nested(func, levels - 1)
+    return func(2)
+
+
+def _time_us(func, number):
+
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+
+def bench_calling_method_text():
+
+    # A typical request resolves the caller ~3 times (response, validator, session)
+    for levels in (5, 30):
+        before = _time_us(lambda: _nested(_inspect_stack_calling_method_text, levels), 200)
+        after = _time_us(lambda: _nested(get_calling_method_text, levels), 20000)
+        print(f"get_calling_method_text, stack depth {levels:>2}: inspect.stack {before:>9.1f} us"
+              f"  frame walk {after:>6.2f} us  (~{3 * (before - after) / 1000:.2f} ms saved per request)")
+
+
+def _eager_log_exception(client_id, e, calling_method_name=None, include_traceback=True, response_id=None):
+
+    # Previous log_exception, kept here for comparison: always extracts the
+    # traceback and builds the details string by concatenation
+    log = logging.getLogger("domestique.logging")
+    exception_identifier = generate_shorter_id()
+    file_name, line_number, func_name, text = traceback.extract_tb(e.__traceback__)[-1]
+    message = f"An error occurred for client_id '{client_id}' in '{calling_method_name}' - Guru Meditation Reference: {exception_identifier}"
+    log.exception(message, exc_info=False)
+
+    details = f"Details for exception ID {exception_identifier}"
+    details += f" [response ID: {response_id}]:" if response_id else ":"
+    line_prefix = f"\n {exception_identifier} - "
+    details += line_prefix + f"File: {file_name}"
+    details += line_prefix + f"Line: {line_number}"
+    details += line_prefix + f"Function: {func_name}"
+    details += line_prefix + f"Error line: {text}"
+    details += line_prefix + f"Error message: {e}"
+    if include_traceback:
+        tb_line = 0
+        exc_traceback = e.__traceback__
+        while exc_traceback is not None:
+            frame = exc_traceback.tb_frame
+            details += f"{line_prefix}traceback[{tb_line}] {frame.f_globals['__name__']}.{frame.f_code.co_name} - {frame.f_code.co_filename},{exc_traceback.tb_lineno}"
+            tb_line += 1
+            exc_traceback = exc_traceback.tb_next
+    log.error(details)
+
+    return message, exception_identifier
+
+
+def _raise_nested(levels):
+
+    if levels:
+        _raise_nested(levels - 1)
+    raise RuntimeError("database unavailable")
+
+
+def _caught_exception(levels):
+
+    try:
+        _raise_nested(levels)
+    except RuntimeError as e:
+        return e
+
+
+def bench_log_exception():
+
+    log = logging.getLogger("domestique.logging")
+    saved = (log.handlers[:], log.propagate, log.level)
+    handler = logging.StreamHandler(io.StringIO())
+    log.handlers = [handler]
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+
+    try:
+        for levels in (5, 25):
+            e = _caught_exception(levels)
+            for label, handler_level in (("emitted", logging.DEBUG), ("dropped by handler", logging.CRITICAL)):
+                handler.setLevel(handler_level)
+                handler.stream = io.StringIO()
+                before = _time_us(lambda: _eager_log_exception("client", e, "bench", response_id="r1"), 2000)
+                handler.stream = io.StringIO()
+                after = _time_us(lambda: log_exception("client", e, "bench", response_id="r1"), 2000)
+                print(f"log_exception, {levels + 2:>2} frames, {label:<18}: eager {before:>7.1f} us"
+                      f"  deferred {after:>7.1f} us  ({before / after:.1f}x)")
+    finally:
+        log.handlers, log.propagate, log.level = saved
+
+
+def main():
+
+    bench_calling_method_text()
+    bench_log_exception()
+
+
+if __name__ == "__main__":
+    main()
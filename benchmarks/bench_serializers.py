@@ -0,0 +1,73 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Compare the response serializer backends on 1 KB, 100 KB and 10 MB list
+payloads. The baseline column is the stdlib call made by Starlette's
+JSONResponse.render().
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serializers
+"""
+
+import json
+import timeit
+
+from domestique.json import JSON_SERIALIZERS, dumps, orjson
+
+
+def _payload(target_bytes):
+
+    records = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        record = {
+            "id": f"3f2b8c1e-0000-4000-8000-{i:012d}",
+            "name": f"Record number {i}",
+            "active": i % 3 == 0,
+            "score": i * 1.5,
+            "tags": ["alpha", "beta", "gamma"],
+        }
+        records.append(record)
+        size += len(json.dumps(record)) + 1
+        i += 1
+    return {"message": "OK", "items": records}
+
+
+def _baseline(content):
+
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _time_ms(func, number):
+
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000
+
+
+def main():
+
+    for label, target, number in (("1 KB", 1024, 2000), ("100 KB", 100 * 1024, 50), ("10 MB", 10 * 1024 * 1024, 1)):
+        content = _payload(target)
+        results = [f"baseline {_time_ms(lambda: _baseline(content), number):.3f} ms"]
+        for serializer in JSON_SERIALIZERS:
+            if serializer == "orjson" and orjson is None:
+                continue
+            results.append(f"{serializer} {_time_ms(lambda: dumps(content, serializer), number):.3f} ms")
+        print(f"{label:<7} " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    main()
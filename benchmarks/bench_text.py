@@ -0,0 +1,51 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Compare truncate_string/tidy_and_truncate_string with and without bounded
+mode on large inputs.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_text
+"""
+
+import timeit
+
+from domestique.text import truncate_string, tidy_and_truncate_string
+
+
+def _inputs():
+
+    html = "<p>Hello <b>there</b>,\nthis is a line of an email body.</p>\n" * 50_000
+    records = {f"key_{i}": {"id": i, "name": f"record {i}", "tags": ["a", "b", "c"]} for i in range(50_000)}
+    return (("3 MB HTML string", html), ("50k-entry dict", records))
+
+
+def _time_ms(func, number=5):
+
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1000
+
+
+def main():
+
+    for label, value in _inputs():
+        for name, func in (("truncate_string", truncate_string), ("tidy_and_truncate_string", tidy_and_truncate_string)):
+            plain = _time_ms(lambda: func(value, 120))
+            bounded = _time_ms(lambda: func(value, 120, bounded=True))
+            print(f"{label:<18} {name:<26} default {plain:>10.3f} ms  bounded {bounded:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,25 +12,129 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import contextvars
+import logging
+import threading
 import types
+from contextlib import contextmanager
 
+logger = logging.getLogger(__name__)
+
+# Readers get the current immutable snapshot without locking; writers copy
+# it under _write_lock and swap in the new one
 persistent = types.SimpleNamespace()
-persistent.data = {}
+persistent.data = types.MappingProxyType({})
+
+_write_lock = threading.Lock()
+_listeners = []
+_overrides = contextvars.ContextVar("domestique_persistent_overrides", default=None)
+_MISSING = object()
+
 
 def get_value(key, default=None):
 
+    overrides = _overrides.get()
+    if overrides is not None and key in overrides:
+        return overrides[key]
     return persistent.data.get(key, default)
 
 
 def set_value(key, value):
 
-    persistent.data[key] = value
+    update_values({key: value})
 
 
 def has_value(key):
 
-    return key in persistent.data
+    overrides = _overrides.get()
+    return (overrides is not None and key in overrides) or key in persistent.data
 
 
-set_value("id", "")
+def update_values(values):
+    """Set several values in one atomic swap."""
+
+    values = dict(values)
+
+    def change(data):
+        data.update(values)
+        return list(values)
+
+    _swap(change)
+
+
+def delete_value(key):
+
+    def change(data):
+        return [key] if data.pop(key, _MISSING) is not _MISSING else []
+
+    _swap(change)
+
+
+def get_snapshot():
+    """Return an immutable mapping of every value, including overrides in the current context."""
+
+    data = persistent.data
+    overrides = _overrides.get()
+    if overrides:
+        return types.MappingProxyType({**data, **overrides})
+    return data
+
 
+def _swap(change):
+
+    # `change` edits the copy and returns the keys it set or deleted
+    with _write_lock:
+        old = persistent.data
+        data = dict(old)
+        changed = change(data)
+        persistent.data = types.MappingProxyType(data)
+        listeners = list(_listeners)
+
+    if not listeners:
+        return
+    for key in changed:
+        for callback, listen_key in listeners:
+            if listen_key is None or listen_key == key:
+                try:
+                    callback(key, old.get(key), data.get(key))
+                except Exception:
+                    logger.exception(f"Error in persistent value listener for '{key}'")
+
+
+def add_listener(callback, key=None):
+    """
+    Call callback(key, old_value, new_value) after a value is set or deleted,
+    for every key or just `key`. Setting a key always notifies, even with
+    the same object, so a value mutated in place can be announced by setting
+    it again. Overrides do not trigger listeners.
+    """
+
+    with _write_lock:
+        _listeners.append((callback, key))
+
+
+def remove_listener(callback, key=None):
+
+    with _write_lock:
+        try:
+            _listeners.remove((callback, key))
+        except ValueError:
+            pass
+
+
+@contextmanager
+def override_values(values):
+    """
+    Override values for the current thread or task (and tasks it starts)
+    until the block exits, e.g. for tests or per-tenant config.
+    """
+
+    current = _overrides.get()
+    token = _overrides.set({**current, **values} if current else dict(values))
+    try:
+        yield
+    finally:
+        _overrides.reset(token)
+
+
+set_value("id", "")
@@ -0,0 +1,248 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Table-driven base-N encoding and decoding for ints, bytes and UUIDs.
+
+Small values are converted two digits at a time using per-alphabet lookup
+tables. Large values are split divide-and-conquer style around cached
+powers of the base, so multi-kilobyte inputs need a handful of big-integer
+divisions/multiplications rather than one per output digit.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import string
+import uuid
+from functools import lru_cache
+
+
+logger = logging.getLogger(__name__)
+
+
+BASE62 = string.digits + string.ascii_uppercase + string.ascii_lowercase
+BASE36 = string.digits + string.ascii_lowercase
+BASE36_UPPER = string.digits + string.ascii_uppercase
+
+# Values up to this many digits are converted directly from the lookup tables
+_LEAF_DIGITS = 32
+
+
+class _Alphabet:
+
+    __slots__ = ("chars", "base", "index", "pairs")
+
+    def __init__(self, chars: str):
+
+        if len(chars) < 2:
+            raise ValueError("Alphabet must contain at least 2 characters")
+        if len(set(chars)) != len(chars):
+            raise ValueError("Alphabet must not contain repeated characters")
+
+        self.chars = chars
+        self.base = len(chars)
+        self.index = {c: i for i, c in enumerate(chars)}
+        self.pairs = tuple(a + b for a in chars for b in chars)
+
+
+_alphabets = {}
+
+
+def _get_alphabet(chars: str) -> _Alphabet:
+
+    alpha = _alphabets.get(chars)
+    if alpha is None:
+        alpha = _Alphabet(chars)
+        if len(_alphabets) < 32:
+            _alphabets[chars] = alpha
+    return alpha
+
+
+@lru_cache(maxsize=256)
+def _power(base: int, exponent: int) -> int:
+
+    return base ** exponent
+
+
+def _digits_needed(number: int, base: int) -> int:
+
+    if number == 0:
+        return 1
+    # Estimate from the bit length, then correct for rounding either way
+    width = max(1, int(number.bit_length() / math.log2(base)))
+    while _power(base, width) <= number:
+        width += 1
+    while width > 1 and _power(base, width - 1) > number:
+        width -= 1
+    return width
+
+
+def _encode_leaf(number: int, alpha: _Alphabet, width: int) -> str:
+
+    pairs = alpha.pairs
+    square = alpha.base * alpha.base
+    out = []
+    for _ in range(width // 2):
+        number, rem = divmod(number, square)
+        out.append(pairs[rem])
+    if width % 2:
+        if number >= alpha.base:
+            raise ValueError("Encoded value exceeded expected width")
+        out.append(alpha.chars[number])
+    elif number:
+        raise ValueError("Encoded value exceeded expected width")
+    out.reverse()
+    return "".join(out)
+
+
+def _encode_fixed(number: int, alpha: _Alphabet, width: int) -> str:
+
+    if width <= _LEAF_DIGITS:
+        return _encode_leaf(number, alpha, width)
+    low_width = width // 2
+    high, low = divmod(number, _power(alpha.base, low_width))
+    return _encode_fixed(high, alpha, width - low_width) + _encode_fixed(low, alpha, low_width)
+
+
+def _decode_span(text: str, alpha: _Alphabet) -> int:
+
+    if len(text) <= _LEAF_DIGITS:
+        index = alpha.index
+        base = alpha.base
+        number = 0
+        try:
+            for c in text:
+                number = number * base + index[c]
+        except KeyError as e:
+            raise ValueError(f"Invalid character for alphabet: {e.args[0]!r}") from None
+        return number
+    low_width = len(text) // 2
+    high = _decode_span(text[:-low_width], alpha)
+    low = _decode_span(text[-low_width:], alpha)
+    return high * _power(alpha.base, low_width) + low
+
+
+def encode_int(number: int, alphabet: str = BASE62, width: int = None) -> str:
+    """
+    Encode a non-negative integer using the digits in `alphabet`.
+
+    Args:
+        number: Value to encode.
+        alphabet: Digit characters, lowest first. The base is its length.
+        width: If given, left-pad with the zero digit to exactly this many
+            characters; ValueError if the value does not fit.
+    """
+
+    if number < 0:
+        raise ValueError("Number must be non-negative")
+    alpha = _get_alphabet(alphabet)
+
+    if width is None:
+        width = _digits_needed(number, alpha.base)
+
+    # Overflow beyond `width` is detected in the most significant leaf
+    return _encode_fixed(number, alpha, width)
+
+
+def encode_ints(numbers, alphabet: str = BASE62, width: int = None) -> list[str]:
+    """Encode an iterable of integers as for encode_int(), resolving the alphabet tables once."""
+
+    alpha = _get_alphabet(alphabet)
+    encode = _encode_leaf if width is not None and width <= _LEAF_DIGITS else _encode_fixed
+    out = []
+    for number in numbers:
+        if number < 0:
+            raise ValueError("Number must be non-negative")
+        out.append(encode(number, alpha, width if width is not None else _digits_needed(number, alpha.base)))
+    return out
+
+
+def decode_int(text: str, alphabet: str = BASE62) -> int:
+    """Decode a string produced by encode_int() back to an integer."""
+
+    if not text:
+        raise ValueError("Cannot decode an empty string")
+
+    return _decode_span(text, _get_alphabet(alphabet))
+
+
+def encode_bytes(data: bytes, alphabet: str = BASE62) -> str:
+    """
+    Encode bytes as a base-N string.
+
+    The bytes are treated as one big-endian integer. Each leading zero byte
+    becomes one leading zero digit (as in base58), so the encoding is
+    reversible for any input, including b"" and all-zero inputs.
+    """
+
+    data = bytes(data)
+    stripped = data.lstrip(b"\0")
+    leading = len(data) - len(stripped)
+    zero = alphabet[0]
+
+    if not stripped:
+        _get_alphabet(alphabet)
+        return zero * leading
+
+    return zero * leading + encode_int(int.from_bytes(stripped, "big"), alphabet)
+
+
+def decode_bytes(text: str, alphabet: str = BASE62) -> bytes:
+    """Decode a string produced by encode_bytes() back to bytes."""
+
+    zero = alphabet[0]
+    stripped = text.lstrip(zero)
+    leading = len(text) - len(stripped)
+
+    if not stripped:
+        _get_alphabet(alphabet)
+        return b"\0" * leading
+
+    number = decode_int(stripped, alphabet)
+    return b"\0" * leading + number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+
+def uuid_width(alphabet: str = BASE62) -> int:
+    """Return the fixed number of characters needed for any UUID in `alphabet`."""
+
+    return _digits_needed((1 << 128) - 1, _get_alphabet(alphabet).base)
+
+
+def encode_uuid(value, alphabet: str = BASE62, width: int = None) -> str:
+    """
+    Encode a UUID (uuid.UUID or UUID string) as a fixed-width base-N string.
+
+    The width defaults to uuid_width(alphabet), e.g. 22 chars for base-62
+    and 25 for base-36, so the output sorts in the same order as the UUIDs
+    when the alphabet is in ASCII order.
+    """
+
+    if not isinstance(value, uuid.UUID):
+        value = uuid.UUID(value)
+    if width is None:
+        width = uuid_width(alphabet)
+
+    return encode_int(value.int, alphabet, width)
+
+
+def decode_uuid(text: str, alphabet: str = BASE62) -> uuid.UUID:
+    """Decode a string produced by encode_uuid() back to a uuid.UUID."""
+
+    number = decode_int(text, alphabet)
+    if number >> 128:
+        raise ValueError("Decoded value is too large for a UUID")
+
+    return uuid.UUID(int=number)
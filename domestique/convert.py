@@ -13,16 +13,25 @@
 # under the License.
 
 import logging
+import datetime
+
+from .json import loads
 
 logger = logging.getLogger(__name__)
 
 
+_TRUE_STRINGS = frozenset(('true', '1', 't', 'y', 'yes'))
+_FALSE_STRINGS = frozenset(('false', '0', 'f', 'n', 'no'))
+_BOOL_LOOKUP = {**dict.fromkeys(_TRUE_STRINGS, True), **dict.fromkeys(_FALSE_STRINGS, False)}
+
+
 def str_to_bool(value):
     if not value:
         return False
-    if value.lower() in ('true', '1', 't', 'y', 'yes'):
+    lowered = value.lower()
+    if lowered in _TRUE_STRINGS:
         return True
-    elif value.lower() in ('false', '0', 'f', 'n', 'no'):
+    elif lowered in _FALSE_STRINGS:
         return False
     else:
         raise ValueError("Invalid boolean value")
@@ -59,4 +68,287 @@ def get_dict_or_string(value):
     elif isinstance(value, dict):
         return value
     else:
-        return str(value)
\ No newline at end of file
+        return str(value)
+
+
+class PropertyIndex:
+    """
+    Hash indexes over a list of dicts, for repeated lookups that would
+    otherwise each be a linear extract_object_by_property() scan.
+
+    Each indexed property is a key name, or a tuple of key names for a
+    composite index (looked up with a tuple of values). Indexes are built in
+    a single pass and kept up to date by add() and remove(). As with
+    extract_object_by_property(), non-dict items and dicts missing an
+    indexed key are left out of that index. To change an indexed value,
+    remove() the object, update it, then add() it again.
+
+    Args:
+        objects: Optional iterable of dicts to index.
+        properties: Properties to index, allowing several objects per value.
+        unique_properties: Properties to index that must be unique; add()
+            raises ValueError on a duplicate value.
+    """
+
+    def __init__(self, objects=None, properties=None, unique_properties=None):
+
+        self._unique = set(unique_properties or ())
+        self._indexes = {prop: {} for prop in (*(properties or ()), *self._unique)}
+        if not self._indexes:
+            raise ValueError("PropertyIndex requires at least one property to index")
+
+        # Keyed by id() since dicts are unhashable; preserves insertion order
+        self._objects = {}
+
+        if objects:
+            for obj in objects:
+                self.add(obj)
+
+    @staticmethod
+    def _key(obj, prop):
+
+        if not isinstance(obj, dict):
+            return None, False
+        if isinstance(prop, tuple):
+            if not all(name in obj for name in prop):
+                return None, False
+            return tuple(obj[name] for name in prop), True
+        if prop not in obj:
+            return None, False
+        return obj[prop], True
+
+    def add(self, obj):
+
+        if id(obj) in self._objects:
+            return
+
+        keys = []
+        for prop, index in self._indexes.items():
+            key, present = self._key(obj, prop)
+            if not present:
+                continue
+            try:
+                bucket = index.get(key)
+            except TypeError:
+                raise TypeError(f"Unhashable value for indexed property {prop!r}") from None
+            if bucket and prop in self._unique:
+                raise ValueError(f"Duplicate value for unique property {prop!r}: {key!r}")
+            keys.append((index, key, bucket))
+
+        for index, key, bucket in keys:
+            if bucket is None:
+                index[key] = [obj]
+            else:
+                bucket.append(obj)
+        self._objects[id(obj)] = obj
+
+    def remove(self, obj):
+
+        if self._objects.pop(id(obj), None) is None:
+            raise ValueError("Object is not in the index")
+
+        for prop, index in self._indexes.items():
+            key, present = self._key(obj, prop)
+            if not present:
+                continue
+            bucket = index[key]
+            for i, item in enumerate(bucket):
+                if item is obj:
+                    del bucket[i]
+                    break
+            if not bucket:
+                del index[key]
+
+    def _bucket(self, prop, value):
+
+        index = self._indexes.get(prop)
+        if index is None:
+            raise ValueError(f"Property is not indexed: {prop!r}")
+        return index.get(value, ())
+
+    def get(self, prop, value):
+        """Return the first object added with `prop` equal to `value`, or None."""
+
+        bucket = self._bucket(prop, value)
+        return bucket[0] if bucket else None
+
+    def get_all(self, prop, value):
+        """Return all objects with `prop` equal to `value`, in the order added."""
+
+        return list(self._bucket(prop, value))
+
+    def __contains__(self, obj):
+
+        return id(obj) in self._objects
+
+    def __iter__(self):
+
+        return iter(list(self._objects.values()))
+
+    def __len__(self):
+
+        return len(self._objects)
+
+
+def _to_bool(value, _lookup=_BOOL_LOOKUP):
+
+    if value is True or value is False:
+        return value
+    if isinstance(value, str):
+        result = _lookup.get(value)
+        if result is None:
+            result = _lookup.get(value.lower())
+        if result is not None:
+            return result
+    elif value == 0 or value == 1:
+        return bool(value)
+    raise ValueError(f"Invalid boolean value: {value!r}")
+
+
+def _to_int(value):
+
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"Invalid integer value: {value!r}")
+    return int(value)
+
+
+def _to_date(value):
+
+    if type(value) is datetime.date:
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return datetime.date.fromisoformat(value)
+
+
+def _to_datetime(value):
+
+    if isinstance(value, datetime.datetime):
+        return value
+    return datetime.datetime.fromisoformat(value)
+
+
+def _to_json(value):
+
+    if isinstance(value, (dict, list)):
+        return value
+    return loads(value)
+
+
+_COLUMN_TYPES = {
+    "str": str,
+    "int": _to_int,
+    "float": float,
+    "bool": _to_bool,
+    "date": _to_date,
+    "datetime": _to_datetime,
+    "json": _to_json,
+    "dict_or_string": get_dict_or_string,
+    "dict_list_or_string": get_dict_list_or_string,
+}
+
+
+class RowConverter:
+    """
+    Convert rows (dicts, sqlite3.Row or other mappings) by a column schema.
+
+    The schema maps column names to a type name ("str", "int", "float",
+    "bool", "date", "datetime", "json", "dict_or_string",
+    "dict_list_or_string") or to any callable taking one value. A
+    conversion function is compiled per column once, up front; "bool"
+    accepts the same strings as str_to_bool() via a single dict lookup.
+
+    None and empty strings convert to None (for "str" columns, only None
+    does). Conversion failures are collected rather than raised: the failed
+    field is set to None and an error entry is recorded.
+
+    Args:
+        schema: Mapping of column name to type name or callable.
+        passthrough: If True, columns not in the schema are copied
+            unchanged; if False they are dropped.
+    """
+
+    def __init__(self, schema, passthrough=True):
+
+        if not schema:
+            raise ValueError("RowConverter requires a non-empty schema")
+
+        self.passthrough = passthrough
+        self._converters = {}
+        for column, spec in schema.items():
+            if callable(spec):
+                func = spec
+            elif spec in _COLUMN_TYPES:
+                func = _COLUMN_TYPES[spec]
+            else:
+                raise ValueError(f"Unknown column type for '{column}': {spec!r}")
+            self._converters[column] = self._compile(func, keep_empty=spec == "str")
+
+    @staticmethod
+    def _compile(func, keep_empty):
+
+        if keep_empty:
+            def convert(value):
+                return None if value is None else func(value)
+        else:
+            def convert(value):
+                return None if value is None or value == "" else func(value)
+        return convert
+
+    def convert_rows(self, rows, skip_invalid=False):
+        """
+        Convert an iterable of rows. Returns (converted_rows, errors), where
+        each error is a dict with "row" (index in the input), "column",
+        "value" and "error". With skip_invalid=True, rows with any error are
+        left out of converted_rows.
+        """
+
+        converters = self._converters.items()
+        passthrough = self.passthrough
+        converted = []
+        errors = []
+
+        for row_index, row in enumerate(rows):
+            # sqlite3.Row supports keys() and [] but not get()
+            source = row if isinstance(row, dict) else dict(row)
+            out = dict(source) if passthrough else {}
+            failed = False
+            for column, convert in converters:
+                value = source.get(column)
+                try:
+                    out[column] = convert(value)
+                except (ValueError, TypeError) as e:
+                    out[column] = None
+                    errors.append({"row": row_index, "column": column, "value": value, "error": str(e)})
+                    failed = True
+            if not (failed and skip_invalid):
+                converted.append(out)
+
+        return converted, errors
+
+    def convert_row(self, row):
+        """Convert a single row. Returns (converted_row, errors)."""
+
+        converted, errors = self.convert_rows((row,))
+        return converted[0], errors
+
+    def convert_column(self, column, values):
+        """
+        Convert a whole column of values. Returns (converted_values, errors),
+        where "row" in each error is the index into `values`.
+        """
+
+        convert = self._converters.get(column)
+        if convert is None:
+            raise ValueError(f"Column is not in the schema: {column!r}")
+
+        converted = []
+        errors = []
+        for row_index, value in enumerate(values):
+            try:
+                converted.append(convert(value))
+            except (ValueError, TypeError) as e:
+                converted.append(None)
+                errors.append({"row": row_index, "column": column, "value": value, "error": str(e)})
+
+        return converted, errors
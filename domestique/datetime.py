@@ -14,6 +14,9 @@
 
 import logging
 import time
+import threading
+import contextvars
+from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
@@ -22,3 +25,225 @@ def get_current_time_ms():
 
     return int(time.time() * 1000)
 
+
+def get_monotonic_time_ms():
+
+    # For measuring intervals; unaffected by system clock adjustments
+    return time.monotonic_ns() // 1_000_000
+
+
+class Stopwatch:
+    """
+    Measures elapsed time with time.perf_counter_ns, optionally split into
+    named phases. Phases with the same name accumulate.
+    """
+
+    __slots__ = ("start_ns", "stop_ns", "phases", "_mark_ns")
+
+    def __init__(self):
+
+        self.start_ns = self._mark_ns = time.perf_counter_ns()
+        self.stop_ns = None
+        self.phases = {}
+
+    def stop(self):
+
+        if self.stop_ns is None:
+            self.stop_ns = time.perf_counter_ns()
+        return self.elapsed_ns()
+
+    def elapsed_ns(self):
+
+        end_ns = self.stop_ns if self.stop_ns is not None else time.perf_counter_ns()
+        return end_ns - self.start_ns
+
+    def elapsed_ms(self):
+
+        return self.elapsed_ns() / 1_000_000
+
+    def mark(self, name):
+        """Record the time since the previous mark (or the start) as phase `name`."""
+
+        now_ns = time.perf_counter_ns()
+        self.phases[name] = self.phases.get(name, 0) + now_ns - self._mark_ns
+        self._mark_ns = now_ns
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as phase `name`."""
+
+        start_ns = time.perf_counter_ns()
+        try:
+            yield self
+        finally:
+            end_ns = time.perf_counter_ns()
+            self.phases[name] = self.phases.get(name, 0) + end_ns - start_ns
+            self._mark_ns = end_ns
+
+    def phases_ms(self):
+
+        return {name: duration_ns / 1_000_000 for name, duration_ns in self.phases.items()}
+
+
+_current_span = contextvars.ContextVar("domestique_current_span", default=None)
+
+
+class Span:
+    """
+    A named, nestable timing span. Used as a context manager, a span
+    becomes the parent of spans entered inside it on the same thread or
+    task, building a tree that to_dict() reports in milliseconds.
+    """
+
+    __slots__ = ("name", "parent", "children", "start_ns", "end_ns", "_token")
+
+    def __init__(self, name, parent=None):
+
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.start_ns = None
+        self.end_ns = None
+        self._token = None
+
+    def start(self):
+
+        if self.parent is None:
+            self.parent = _current_span.get()
+        if self.parent is not None:
+            self.parent.children.append(self)
+        self._token = _current_span.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def finish(self):
+
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Finished in a different context than it started in
+                _current_span.set(self.parent)
+            self._token = None
+        return self.duration_ns
+
+    def __enter__(self):
+
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+
+        self.finish()
+
+    @property
+    def duration_ns(self):
+
+        if self.start_ns is None:
+            return 0
+        end_ns = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return end_ns - self.start_ns
+
+    @property
+    def duration_ms(self):
+
+        return self.duration_ns / 1_000_000
+
+    def child(self, name):
+
+        return Span(name, parent=self)
+
+    def to_dict(self):
+
+        result = {"name": self.name, "duration_ms": round(self.duration_ms, 3)}
+        if self.children:
+            result["children"] = [child.to_dict() for child in self.children]
+        return result
+
+
+def span(name):
+    """Return a Span nested under the current span, for use in a with statement."""
+
+    return Span(name)
+
+
+def get_current_span():
+
+    return _current_span.get()
+
+
+class CoarseClock:
+    """
+    A millisecond wall clock refreshed by a daemon thread every
+    `interval_ms`, for call sites that timestamp too often to afford a
+    clock call each time. Readings may lag by up to one interval.
+    """
+
+    def __init__(self, interval_ms=1):
+
+        if interval_ms <= 0:
+            raise ValueError("interval_ms must be positive")
+
+        self.interval_ms = interval_ms
+        self.now_ms = get_current_time_ms()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="domestique-coarse-clock", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self):
+
+        return self._thread is not None
+
+    def _run(self):
+
+        interval = self.interval_ms / 1000
+        while not self._stop_event.wait(interval):
+            self.now_ms = int(time.time() * 1000)
+
+
+_coarse_clock = None
+
+
+def start_coarse_clock(interval_ms=1):
+
+    global _coarse_clock
+
+    if _coarse_clock is not None:
+        _coarse_clock.stop()
+    _coarse_clock = CoarseClock(interval_ms).start()
+    return _coarse_clock
+
+
+def stop_coarse_clock():
+
+    global _coarse_clock
+
+    if _coarse_clock is not None:
+        _coarse_clock.stop()
+        _coarse_clock = None
+
+
+def get_coarse_time_ms():
+    """Current time in ms from the coarse clock if started, otherwise as get_current_time_ms()."""
+
+    clock = _coarse_clock
+    if clock is not None:
+        return clock.now_ms
+    return get_current_time_ms()
+
@@ -13,12 +13,13 @@
 # under the License.
 
 from .session import get_session_context, SessionContext
-from .response import ResponseFormatter
+from .response import ResponseFormatter, FastJSONResponse
 from .decorators import route_decorator
 
 __all__ = [
     "get_session_context",
     "SessionContext",
     "ResponseFormatter",
+    "FastJSONResponse",
     "route_decorator"
 ]
@@ -22,6 +22,7 @@ from typing import Any, Awaitable, Callable, TypeVar, Coroutine
 from fastapi import Request
 
 from ..validation import NoiseLevel
+from ..metrics import record_request
 from .session import get_session_context, SessionContext
 
 logger = logging.getLogger(__name__)
@@ -53,12 +54,18 @@ def route_decorator(func: F) -> F:
         session: SessionContext = get_session_context(request, function_info=function_info, noise_level=NoiseLevel.DEBUG)
         request.state.session = session
 
+        status_code = 500
         try:
-            return await func(*args, **kwargs)
+            response = await func(*args, **kwargs)
+            status_code = getattr(response, "status_code", 200)
+            return response
         except Exception as e:
             logger.debug(f"Unhandled exception in {function_info}")
-            return session.resp.generate_response_with_exception(e)
+            response = session.resp.generate_response_with_exception(e)
+            status_code = response.status_code
+            return response
         finally:
             session.terminate()
+            record_request(function_info, status_code, session.client_id, session.resp.stopwatch.elapsed_ms())
 
     return wrapper  # type: ignore[return-value]
@@ -18,14 +18,34 @@ from fastapi.responses import JSONResponse
 from domestique.text import tidy_and_truncate_string
 from domestique.identifiers import generate_shorter_id
 from domestique.logging import get_calling_method_text, log_exception
+from domestique.json import dumps
+from domestique.datetime import Stopwatch
 
 logger = logging.getLogger(__name__)
 
 META = "_meta"
 
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with domestique.json.dumps: orjson when installed,
+    stdlib json otherwise, with datetimes, UUIDs and sqlite3.Row handled.
+    """
+
+    def __init__(self, content, *args, serializer=None, **kwargs):
+
+        self.serializer = serializer
+        super().__init__(content, *args, **kwargs)
+
+
+    def render(self, content) -> bytes:
+
+        return dumps(content, self.serializer)
+
+
 class ResponseFormatter:
 
-    def __init__(self, client_id: str, request, function_info=None, abstraction_level=3):
+    def __init__(self, client_id: str, request, function_info=None, abstraction_level=3, serializer=None):
 
         if not request:
             raise ValueError("ResponseFormatter requires a request object")
@@ -33,11 +53,14 @@ class ResponseFormatter:
         self.request = request
         self.client_id = client_id
         self.start_time = datetime.utcnow()
+        self.stopwatch = Stopwatch()
         self.response_id = generate_shorter_id()
         self.method_text = function_info or get_calling_method_text(abstraction_level)
         self.exception_id = None
+        self.serializer = serializer
 
-        logger.debug(f"Init ResponseFormatter: client_id={client_id}, url={request.url}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Init ResponseFormatter: client_id={client_id}, url={request.url}")
 
 
     def _infer_status(self, e) -> int:
@@ -95,7 +118,7 @@ class ResponseFormatter:
     def _generate(self, data, status_code, headers=None):
 
         now = datetime.utcnow()
-        execution_time_ms = int((now - self.start_time).total_seconds() * 1000)
+        execution_time_ms = int(self.stopwatch.elapsed_ms())
         epoch_ms = int(now.timestamp() * 1000)
 
         response_data = {}
@@ -123,11 +146,11 @@ class ResponseFormatter:
 
         response_data[META] = meta
 
-        if "message" in response_data:
-            preview = tidy_and_truncate_string(response_data["message"], 120)
-        else:
-            preview = "with no message"
-
-        logger.debug(f"{self.response_id} [{status_code}] from '{self.method_text}' {preview}")
+        if logger.isEnabledFor(logging.DEBUG):
+            if "message" in response_data:
+                preview = tidy_and_truncate_string(response_data["message"], 120, bounded=True)
+            else:
+                preview = "with no message"
+            logger.debug(f"{self.response_id} [{status_code}] from '{self.method_text}' {preview}")
 
-        return JSONResponse(status_code=status_code, content=response_data, headers=headers)
+        return FastJSONResponse(status_code=status_code, content=response_data, headers=headers, serializer=self.serializer)
@@ -20,7 +20,8 @@ from typing import Optional, Dict, Any
 
 from fastapi import Request
 
-from ..validation import Validator, NoiseLevel
+from ..validation import Validator, NoiseLevel, Schema
+from ..logging import new_request_context, reset_request_context
 from .response import ResponseFormatter
 
 logger = logging.getLogger(__name__)
@@ -55,24 +56,35 @@ class SessionContext:
 
         self.state: Dict[str, Any] = {}
 
-        logger.debug(f"SessionContext created: client_id={client_id} func={function_info}")
+        self._context_token = new_request_context(
+            response_id=self.resp.response_id,
+            client_id=client_id,
+            handler=function_info,
+        )
+
+        logger.debug("SessionContext created: client_id=%s func=%s", client_id, function_info)
 
 
     def terminate(self) -> None:
 
         try:
-            logger.debug(f"Terminating session for {self.function_info} (client_id={self.client_id})")
+            logger.debug("Terminating session for %s (client_id=%s)", self.function_info, self.client_id)
         except Exception:
             logger.exception("Error while terminating session")
+        finally:
+            reset_request_context(self._context_token)
 
 
     def validate_params(
         self,
         required: Optional[list[str]] = None,
+        schema: Optional[Schema] = None,
         **values: Any,
     ) -> None:
 
-        if required:
+        if schema is not None:
+            self.validator.check_schema(schema, **values)
+        elif required:
             self.validator.check(required_keys=required, **values)
         else:
             self.validator.check_all(**values)
@@ -99,13 +111,11 @@ def get_session_context(
         caller = frm.f_back if frm else None
         func = caller.f_locals.get('func') if caller else None  # decorator path
         if func is None:
-            # Fallback: best effort using the stack
-            stack_func = None
-            for fr in inspect.stack():
-                if fr.function not in {"wrapper", "inner", "<lambda>"}:
-                    stack_func = fr
-                    break
-            function_info = f"{stack_func.filename}:{stack_func.lineno}" if stack_func else "unknown"
+            # Fallback: best effort by walking frames (cheaper than inspect.stack())
+            stack_frame = caller
+            while stack_frame is not None and stack_frame.f_code.co_name in {"wrapper", "inner", "<lambda>"}:
+                stack_frame = stack_frame.f_back
+            function_info = f"{stack_frame.f_code.co_filename}:{stack_frame.f_lineno}" if stack_frame else "unknown"
         else:
             function_info = _derive_function_info_from_handler(func)
 
@@ -15,13 +15,15 @@
 from __future__ import annotations
 from typing import Mapping, Any, Iterable, Optional
 
+from ..validation import Schema
 from .session import SessionContext
 
 
 def validate(
     session: SessionContext,
     values: Mapping[str, Any],
-    required: Optional[Iterable[str]] = None
+    required: Optional[Iterable[str]] = None,
+    schema: Optional[Schema] = None
 ) -> None:
 
-    session.validate_params(required=list(required) if required else None, **values)
+    session.validate_params(required=list(required) if required else None, schema=schema, **values)
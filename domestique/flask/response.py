@@ -16,7 +16,8 @@ import logging
 
 from datetime import datetime
 
-from flask import make_response, jsonify
+from flask import current_app, make_response
+from flask.json.provider import DefaultJSONProvider
 
 import requests
 from requests.exceptions import JSONDecodeError
@@ -26,6 +27,8 @@ from .. import _persistent
 from ..text import tidy_and_truncate_string, truncate_string
 from ..identifiers import generate_id, generate_shorter_id
 from ..convert import get_dict_or_string
+from ..json import dumps
+from ..datetime import Stopwatch
 
 from ..logging import get_calling_method_text, get_calling_method_name_quick, log_exception
 
@@ -35,9 +38,16 @@ logger = logging.getLogger(__name__)
 META = "_meta"
 
 
+def _has_custom_json_provider(app):
+
+    # Settings changed on the default provider (e.g. app.json.sort_keys = False) count as custom
+    provider = app.json
+    return type(provider) is not DefaultJSONProvider or any(key != "_app" for key in vars(provider))
+
+
 class ResponseWrapper:
 
-    def __init__(self, request, client_id=None, calling_method_text=None, abstraction_level=3):
+    def __init__(self, request, client_id=None, calling_method_text=None, abstraction_level=3, serializer=None):
 
         if not request:
             raise ValueError("ResponseWrapper requires a request parameter!")
@@ -46,6 +56,7 @@ class ResponseWrapper:
             calling_method_text = get_calling_method_text(abstraction_level)
 
         self.start_time = datetime.now()
+        self.stopwatch = Stopwatch()
         self.response_id = generate_shorter_id()
         self.request = request
         self.response_data = {}
@@ -56,12 +67,14 @@ class ResponseWrapper:
         self.client_id = client_id
         self.exception_id = None
         self.method_text = calling_method_text
+        self.serializer = serializer
 
-        debug_message = "Init ResponseWrapper: "
-        if client_id:
-            debug_message += f"client_id: {client_id}, "
-        debug_message += f"url: {request.url}"
-        logger.debug(debug_message)
+        if logger.isEnabledFor(logging.DEBUG):
+            debug_message = "Init ResponseWrapper: "
+            if client_id:
+                debug_message += f"client_id: {client_id}, "
+            debug_message += f"url: {request.url}"
+            logger.debug(debug_message)
 
 
     def get_id(self):
@@ -87,7 +100,7 @@ class ResponseWrapper:
         if isinstance(data, dict):
             self.response_data = data.copy()
         elif isinstance(data, list):
-            self.response_data = jsonify(data)
+            self.response_data = data
         elif isinstance(data, tuple):
             message, exception_identifier = data
             self.exception_id = exception_identifier
@@ -132,7 +145,7 @@ class ResponseWrapper:
 
         current_time = datetime.now()
         epoch_ms = int(current_time.timestamp() * 1000)
-        execution_time_ms = int((current_time - self.start_time).total_seconds() * 1000)
+        execution_time_ms = int(self.stopwatch.elapsed_ms())
 
         if isinstance(self.response_data, dict):
             return_response_data = self.response_data.copy()
@@ -156,14 +169,23 @@ class ResponseWrapper:
             if isinstance(return_response_data, dict):
                 return_response_data[META] = self.meta
 
-        if isinstance(return_response_data, dict) and return_response_data.get('message'):
-            msg_text_for_debug = "with message: " + tidy_and_truncate_string(return_response_data.get('message'), 120)
+        if logger.isEnabledFor(logging.DEBUG):
+            if isinstance(return_response_data, dict) and return_response_data.get('message'):
+                msg_text_for_debug = "with message: " + tidy_and_truncate_string(return_response_data.get('message'), 120, bounded=True)
+            else:
+                msg_text_for_debug = "with no message"
+            logger.debug(f"{self.response_id} [{self.code}] from '{self.method_text}' {msg_text_for_debug}")
+
+        if isinstance(return_response_data, (dict, list)):
+            # An app's own JSON provider takes precedence unless a serializer was chosen explicitly
+            if self.serializer is None and _has_custom_json_provider(current_app):
+                resp = current_app.json.response(return_response_data)
+                resp.status_code = self.code
+            else:
+                resp = make_response(dumps(return_response_data, self.serializer, http_dates=True), self.code)
+                resp.mimetype = "application/json"
         else:
-            msg_text_for_debug = "with no message"
-
-        logger.debug(f"{self.response_id} [{self.code}] from '{self.method_text}' {msg_text_for_debug}")
-
-        resp = make_response(return_response_data, self.code)
+            resp = make_response(return_response_data, self.code)
         if headers:
             for k, v in headers.items():
                 resp.headers[k] = v
@@ -18,6 +18,8 @@ from flask import request
 
 from ..db import conn_commit, conn_close
 from ..validation import Validator, NoiseLevel
+from ..logging import new_request_context, reset_request_context, log_exception
+from ..metrics import record_request
 from .response import ResponseWrapper
 
 
@@ -27,7 +29,7 @@ logger = logging.getLogger(__name__)
 
 class Session:
 
-    def __init__(self, client_id, request, calling_method_text=None, validator_noise_level=NoiseLevel.DEBUG):
+    def __init__(self, client_id, request, calling_method_text=None, validator_noise_level=NoiseLevel.DEBUG, serializer=None):
 
         if not client_id:
             raise ValueError("Session init missing required parameter: client_id")
@@ -39,12 +41,14 @@ class Session:
         self._conn = None
 
         try:
-            self._resp = ResponseWrapper(request, client_id, calling_method_text)
+            self._resp = ResponseWrapper(request, client_id, calling_method_text, serializer=serializer)
         except Exception as e:
             log_exception(client_id, e)
             raise e
 
         self._id = self._resp.get_id()
+        # Owned by the session so terminate() always undoes it
+        self._context_token = new_request_context(response_id=self._id, client_id=client_id, handler=self._resp.method_text)
 
         logging_identifiers = [client_id, self._id]
 
@@ -60,6 +64,8 @@ class Session:
 
         conn_close(self._conn)
         self._conn = None
+        reset_request_context(self._context_token)
+        record_request(self._resp.method_text, self._resp.code, self._client_id, self._resp.stopwatch.elapsed_ms())
 
 
     @property
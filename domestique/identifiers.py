@@ -15,14 +15,41 @@
 from __future__ import annotations
 
 import logging
+import os
+import threading
+import time
 import uuid
 import base64
+import hashlib
+import math
 import string
 import secrets
+from functools import lru_cache
+from datetime import datetime, timezone
 
+from .codec import BASE62, BASE36, encode_int, encode_ints, decode_int, decode_uuid
 
-_B62 = string.digits + string.ascii_uppercase + string.ascii_lowercase
-_B36_LOWER = string.digits + string.ascii_lowercase
+
+logger = logging.getLogger(__name__)
+
+
+_B62 = BASE62
+_B36_LOWER = BASE36
+_B36_MOD_22 = 36 ** 22
+
+# Bit masks applied to 128 random bits to produce a valid RFC 4122 UUID4
+_UUID4_CLEAR_MASK = ~((0xc000 << 48) | (0xf000 << 64))
+_UUID4_SET_BITS = (0x8000 << 48) | (4 << 76)
+
+# UUIDv7 layout: 48-bit Unix ms timestamp, version, 74 bits of randomness
+# (12-bit rand_a + 62-bit rand_b) with the RFC 4122 variant in between
+_UUID7_RAND_BITS = 74
+_UUID7_RAND_MAX = (1 << _UUID7_RAND_BITS) - 1
+_UUID7_TIMESTAMP_MAX = (1 << 48) - 1
+
+_time_ordered_lock = threading.Lock()
+_time_ordered_last_ms = 0
+_time_ordered_last_rand = 0
 
 
 def _base36_encode(
@@ -30,41 +57,36 @@ def _base36_encode(
     alphabet: str = string.ascii_lowercase + string.digits,
 ) -> str:
 
-    if number < 0:
-        raise ValueError("number must be non-negative")
-
-    base36 = ""
-    while number:
-        number, i = divmod(number, 36)
-        base36 = alphabet[i] + base36
-
-    return base36 or alphabet[0]
+    return encode_int(number, alphabet)
 
 
 def _encode_base_n(number: int, alphabet: str) -> str:
 
-    if number < 0:
-        raise ValueError("Number must be non-negative")
-    base = len(alphabet)
-    if base < 2:
-        raise ValueError("Alphabet must contain at least 2 characters")
-    if number == 0:
-        return alphabet[0]
-    out = []
-    while number:
-        number, rem = divmod(number, base)
-        out.append(alphabet[rem])
-    out.reverse()
-    return "".join(out)
+    return encode_int(number, alphabet)
 
 
 def _uuid_to_fixed_base(u: uuid.UUID, alphabet: str, width: int) -> str:
 
-    s = _encode_base_n(u.int, alphabet)
-    if len(s) > width:
-        raise ValueError("Encoded value exceeded expected width")
+    return encode_int(u.int, alphabet, width)
+
+
+def _random_uuid4_ints(n: int):
+    """Yield `n` UUID4 integers drawn from a single os.urandom read."""
 
-    return s.rjust(width, alphabet[0])
+    buf = os.urandom(16 * n)
+    from_bytes = int.from_bytes
+    clear_mask = _UUID4_CLEAR_MASK
+    set_bits = _UUID4_SET_BITS
+    for offset in range(0, 16 * n, 16):
+        yield (from_bytes(buf[offset:offset + 16], "big") & clear_mask) | set_bits
+
+
+def _check_count(n: int) -> None:
+
+    if not isinstance(n, int) or isinstance(n, bool):
+        raise TypeError("n must be an integer")
+    if n < 0:
+        raise ValueError("n must be >= 0")
 
 
 def generate_id() -> str:
@@ -90,6 +112,68 @@ def generate_shorter_id(lowercase: bool = False) -> str:
         return _uuid_to_fixed_base(u, _B62, width=22)
 
 
+def _simple_alphabet(lowercase: bool, include_numbers: bool) -> str:
+
+    letters = string.ascii_lowercase if lowercase else string.ascii_uppercase
+    return letters + (string.digits if include_numbers else "")
+
+
+@lru_cache(maxsize=32)
+def _alphabet_translation(alphabet: str) -> tuple[bytes, bytes, int]:
+    """
+    Build bytes.translate() tables mapping random bytes onto `alphabet`.
+
+    Bytes at or above the largest multiple of len(alphabet) are deleted
+    (rejection sampling), so every character is equally likely.
+    """
+
+    size = len(alphabet)
+    if not 2 <= size <= 256 or not alphabet.isascii():
+        raise ValueError("alphabet must contain between 2 and 256 ASCII characters")
+
+    limit = 256 - (256 % size)
+    table = bytes(ord(alphabet[b % size]) for b in range(256))
+    rejected = bytes(range(limit, 256))
+    return table, rejected, limit
+
+
+def _random_alphabet_string(alphabet: str, length: int) -> str:
+    """Return `length` uniformly random characters from `alphabet` using `secrets`."""
+
+    table, rejected, limit = _alphabet_translation(alphabet)
+
+    chunks = []
+    remaining = length
+    while remaining > 0:
+        # Over-request by the expected rejection rate plus a little slack
+        request = remaining * 256 // limit + 8
+        chunk = secrets.token_bytes(request).translate(table, rejected)
+        chunks.append(chunk[:remaining])
+        remaining -= len(chunks[-1])
+
+    return b"".join(chunks).decode("ascii")
+
+
+def _random_hex_string(length: int, lowercase: bool) -> str:
+
+    hexstr = secrets.token_hex((length + 1) // 2)[:length]
+    return hexstr if lowercase else hexstr.upper()
+
+
+def get_uuid_from_shorter_id(value: str) -> uuid.UUID:
+    """
+    Return the uuid.UUID encoded by a base-62 shorter ID, e.g. from
+    generate_shorter_id() or generate_shorter_time_ordered_id().
+
+    Lowercase (base-36) shorter IDs are truncated and cannot be reversed.
+    """
+
+    if len(value) != 22:
+        raise ValueError("Shorter IDs must be 22 characters long")
+
+    return decode_uuid(value, _B62)
+
+
 def generate_simple_random_identifier(
     numchars: int = 6,
     lowercase: bool = True,
@@ -112,16 +196,14 @@ def generate_simple_random_identifier(
     if numchars < 1:
         raise ValueError("numchars must be >= 1")
 
-    letters = string.ascii_lowercase if lowercase else string.ascii_uppercase
-    alphabet = letters + (string.digits if include_numbers else "")
+    alphabet = _simple_alphabet(lowercase, include_numbers)
+    id = _random_alphabet_string(alphabet, numchars)
 
-    id = "".join(secrets.choice(alphabet) for _ in range(numchars))
-    
     if prefix:
         id = f"{prefix}{id}"
     if suffix:
         id = f"{id}{suffix}"
-        
+
     return id
 
 
@@ -144,8 +226,7 @@ def generate_simple_hex_identifier(
     if numchars < 1:
         raise ValueError("numchars must be >= 1")
 
-    hexdigits = "0123456789abcdef" if lowercase else "0123456789ABCDEF"
-    id = "".join(secrets.choice(hexdigits) for _ in range(numchars))
+    id = _random_hex_string(numchars, lowercase)
 
     if prefix:
         id = f"{prefix}{id}"
@@ -153,3 +234,440 @@ def generate_simple_hex_identifier(
         id = f"{id}{suffix}"
 
     return id
+
+
+def generate_simple_random_identifiers(
+    n: int,
+    numchars: int = 6,
+    lowercase: bool = True,
+    include_numbers: bool = False,
+    prefix: str = None,
+    suffix: str = None,
+) -> list[str]:
+    """
+    Return a list of `n` identifiers in the same format as
+    generate_simple_random_identifier(), drawing randomness for the whole
+    batch from as few `secrets.token_bytes` reads as possible.
+    """
+
+    _check_count(n)
+    if numchars < 1:
+        raise ValueError("numchars must be >= 1")
+
+    alphabet = _simple_alphabet(lowercase, include_numbers)
+    chars = _random_alphabet_string(alphabet, n * numchars)
+    prefix = prefix or ""
+    suffix = suffix or ""
+
+    return [f"{prefix}{chars[i:i + numchars]}{suffix}" for i in range(0, n * numchars, numchars)]
+
+
+def generate_simple_hex_identifiers(
+    n: int,
+    numchars: int = 6,
+    lowercase: bool = True,
+    prefix: str = "",
+    suffix: str = "",
+) -> list[str]:
+    """
+    Return a list of `n` identifiers in the same format as
+    generate_simple_hex_identifier(), from a single `secrets.token_hex` read.
+    """
+
+    _check_count(n)
+    if numchars < 1:
+        raise ValueError("numchars must be >= 1")
+
+    chars = _random_hex_string(n * numchars, lowercase)
+    prefix = prefix or ""
+    suffix = suffix or ""
+
+    return [f"{prefix}{chars[i:i + numchars]}{suffix}" for i in range(0, n * numchars, numchars)]
+
+
+def generate_ids(n: int) -> list[str]:
+    """
+    Return a list of `n` UUID4 strings, equivalent to calling generate_id()
+    `n` times but drawing all entropy from one os.urandom read.
+    """
+
+    _check_count(n)
+
+    buf = bytearray(os.urandom(16 * n))
+    for offset in range(0, 16 * n, 16):
+        buf[offset + 6] = (buf[offset + 6] & 0x0f) | 0x40
+        buf[offset + 8] = (buf[offset + 8] & 0x3f) | 0x80
+
+    h = buf.hex()
+    ids = []
+    for offset in range(0, 32 * n, 32):
+        ids.append(
+            f"{h[offset:offset + 8]}-{h[offset + 8:offset + 12]}-{h[offset + 12:offset + 16]}-"
+            f"{h[offset + 16:offset + 20]}-{h[offset + 20:offset + 32]}"
+        )
+    return ids
+
+
+def generate_shorter_ids(n: int, lowercase: bool = False) -> list[str]:
+    """
+    Return a list of `n` IDs in the same format as generate_shorter_id().
+
+    Entropy for the whole batch comes from one os.urandom read, and encoding
+    uses two-digit lookup tables rather than one divmod per character.
+
+    - lowercase=False: base-62, 22 chars, [0-9A-Za-z]
+    - lowercase=True : base-36 (lowercase), last 22 chars, [0-9a-z]
+    """
+
+    _check_count(n)
+
+    if lowercase:
+        return encode_ints((u % _B36_MOD_22 for u in _random_uuid4_ints(n)), _B36_LOWER, 22)
+    return encode_ints(_random_uuid4_ints(n), _B62, 22)
+
+
+def _uuid7_int(timestamp_ms: int, rand: int) -> int:
+
+    rand_a = rand >> 62
+    rand_b = rand & ((1 << 62) - 1)
+    return (timestamp_ms << 80) | (7 << 76) | (rand_a << 64) | (0b10 << 62) | rand_b
+
+
+def _next_time_ordered_int() -> int:
+    """
+    Return the next UUIDv7 integer for this process.
+
+    IDs are strictly increasing: within the same millisecond (or if the clock
+    steps backwards) the 74-bit random field of the previous ID is
+    incremented, rolling over into the timestamp if it overflows.
+    """
+    global _time_ordered_last_ms, _time_ordered_last_rand
+
+    now_ms = time.time_ns() // 1_000_000
+    with _time_ordered_lock:
+        if now_ms > _time_ordered_last_ms:
+            timestamp_ms = now_ms
+            rand = int.from_bytes(os.urandom(10), "big") & _UUID7_RAND_MAX
+        else:
+            timestamp_ms = _time_ordered_last_ms
+            rand = _time_ordered_last_rand + 1
+            if rand > _UUID7_RAND_MAX:
+                timestamp_ms += 1
+                rand = int.from_bytes(os.urandom(10), "big") & _UUID7_RAND_MAX
+        _time_ordered_last_ms = timestamp_ms
+        _time_ordered_last_rand = rand
+
+    return _uuid7_int(timestamp_ms, rand)
+
+
+def generate_time_ordered_id() -> str:
+    """
+    Return a UUIDv7 string as ID.
+
+    The leading 48 bits are a millisecond Unix timestamp, so IDs sort by
+    creation time (as strings or as UUIDs) and are monotonic within the
+    process. Suitable for B-tree primary keys where random UUID4 values
+    would scatter inserts across the index.
+    """
+
+    return str(uuid.UUID(int=_next_time_ordered_int()))
+
+
+def generate_shorter_time_ordered_id() -> str:
+    """
+    Short, fixed-length, alphanumeric-only time-ordered ID.
+
+    Base-62, 22 chars, [0-9A-Za-z], encoding the same UUIDv7 value as
+    generate_time_ordered_id(). The alphabet is in ASCII order, so these IDs
+    sort by creation time under plain byte-wise comparison (e.g. SQLite's
+    default BINARY collation).
+    """
+
+    return encode_int(_next_time_ordered_int(), _B62, 22)
+
+
+def _time_ordered_id_to_int(value) -> int:
+
+    if isinstance(value, uuid.UUID):
+        number = value.int
+    elif isinstance(value, str) and len(value) == 22:
+        number = decode_int(value, _B62)
+    elif isinstance(value, str):
+        number = uuid.UUID(value).int
+    else:
+        raise TypeError("value must be a UUID, a UUID string or a 22-char shorter ID")
+
+    if (number >> 76) & 0xf != 7:
+        raise ValueError("Not a time-ordered (UUIDv7) identifier")
+
+    return number
+
+
+def get_time_ordered_id_timestamp_ms(value) -> int:
+    """
+    Return the millisecond Unix timestamp embedded in a time-ordered ID.
+
+    Accepts the output of generate_time_ordered_id() or
+    generate_shorter_time_ordered_id(), or a uuid.UUID.
+    """
+
+    return _time_ordered_id_to_int(value) >> 80
+
+
+def get_time_ordered_id_datetime(value) -> datetime:
+    """Return the creation time embedded in a time-ordered ID as an aware UTC datetime."""
+
+    timestamp_ms = get_time_ordered_id_timestamp_ms(value)
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+
+
+def get_time_ordered_id_bounds(start_ms: int, end_ms: int, shorter: bool = False) -> tuple[str, str]:
+    """
+    Return the (lowest, highest) possible IDs created between `start_ms` and
+    `end_ms` inclusive, for range scans such as `WHERE id BETWEEN ? AND ?`.
+
+    Args:
+        start_ms: Start of the range as a millisecond Unix timestamp.
+        end_ms: End of the range as a millisecond Unix timestamp.
+        shorter: If True, return bounds in the 22-char base-62 form.
+    """
+
+    if not 0 <= start_ms <= end_ms <= _UUID7_TIMESTAMP_MAX:
+        raise ValueError("Require 0 <= start_ms <= end_ms within the 48-bit timestamp range")
+
+    low = _uuid7_int(start_ms, 0)
+    high = _uuid7_int(end_ms, _UUID7_RAND_MAX)
+    if shorter:
+        return encode_int(low, _B62, 22), encode_int(high, _B62, 22)
+    return str(uuid.UUID(int=low)), str(uuid.UUID(int=high))
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter over strings, backed by a bytearray."""
+
+    def __init__(self, expected_items: int, false_positive_rate: float):
+
+        if expected_items < 1:
+            raise ValueError("expected_items must be >= 1")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+
+        num_bits = math.ceil(-expected_items * math.log(false_positive_rate) / (math.log(2) ** 2))
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, round(self.num_bits / expected_items * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.bits_set = 0
+
+    def _positions(self, item: str):
+
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def add(self, item: str) -> None:
+
+        bits = self.bits
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                self.bits_set += 1
+
+    def __contains__(self, item: str) -> bool:
+
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def fill_ratio(self) -> float:
+
+        return self.bits_set / self.num_bits
+
+    @property
+    def false_positive_rate(self) -> float:
+
+        return self.fill_ratio ** self.num_hashes
+
+
+class ShortIdAllocator:
+    """
+    Allocate short random identifiers (as generate_simple_random_identifier())
+    that do not collide with any ID it has issued or been seeded with.
+
+    Known IDs are remembered in a Bloom filter, optionally backed by an exact
+    set. Candidates that may already exist are retried locally, so collisions
+    are handled without a database round-trip. With the filter alone, a false
+    positive just costs an extra retry; it never lets a duplicate through.
+
+    Args:
+        numchars, lowercase, include_numbers, prefix, suffix: As for
+            generate_simple_random_identifier().
+        expected_items: Number of IDs the filter is sized for. Once it is
+            exceeded, a warning is logged and a further filter twice the size
+            is added, so the false-positive rate stays bounded.
+        false_positive_rate: Target filter false-positive rate at
+            `expected_items`.
+        exact: If True, also keep an exact set of IDs so filter false
+            positives do not cause unnecessary retries.
+        max_attempts: Candidates to try per ID before raising RuntimeError.
+    """
+
+    def __init__(
+        self,
+        numchars: int = 6,
+        lowercase: bool = True,
+        include_numbers: bool = False,
+        prefix: str = None,
+        suffix: str = None,
+        expected_items: int = 100_000,
+        false_positive_rate: float = 0.001,
+        exact: bool = False,
+        max_attempts: int = 32,
+    ):
+
+        if numchars < 1:
+            raise ValueError("numchars must be >= 1")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be >= 1")
+
+        self.numchars = numchars
+        self.prefix = prefix or ""
+        self.suffix = suffix or ""
+        self.max_attempts = max_attempts
+        self._alphabet = _simple_alphabet(lowercase, include_numbers)
+        self._keyspace = len(self._alphabet) ** numchars
+        self.expected_items = expected_items
+        # Filled in turn; the newest takes new IDs until it reaches its capacity
+        self._filters = [_BloomFilter(expected_items, false_positive_rate)]
+        self._filter_capacity = expected_items
+        self._filter_false_positive_rate = false_positive_rate
+        self._filter_count = 0
+        self._exact = set() if exact else None
+        self._count = 0
+        self._retries = 0
+        self._lock = threading.Lock()
+
+    def _may_contain(self, id: str) -> bool:
+
+        if not any(id in bloom_filter for bloom_filter in self._filters):
+            return False
+        return self._exact is None or id in self._exact
+
+    def _remember(self, id: str) -> None:
+
+        if self._filter_count >= self._filter_capacity:
+            self._grow_filter()
+        self._filters[-1].add(id)
+        self._filter_count += 1
+        if self._exact is not None:
+            self._exact.add(id)
+        self._count += 1
+
+    def _grow_filter(self) -> None:
+
+        # A full Bloom filter cannot be resized, and past its capacity every
+        # candidate starts to look taken; chain a larger, stricter one instead
+        self._filter_capacity *= 2
+        self._filter_false_positive_rate /= 2
+        self._filters.append(_BloomFilter(self._filter_capacity, self._filter_false_positive_rate))
+        self._filter_count = 0
+        logger.warning(f"ShortIdAllocator has reached {self._count} IDs (expected_items={self.expected_items}); "
+                       f"added a filter for {self._filter_capacity} more")
+
+    def add(self, id: str) -> bool:
+        """Record an externally issued ID. Returns False if it may already be known."""
+
+        with self._lock:
+            if self._may_contain(id):
+                return False
+            self._remember(id)
+            return True
+
+    def seed(self, ids) -> int:
+        """Record an iterable of existing IDs. Returns the number newly recorded."""
+
+        added = 0
+        with self._lock:
+            for id in ids:
+                if id is not None and not self._may_contain(id):
+                    self._remember(id)
+                    added += 1
+        return added
+
+    def seed_from_db(self, conn, sql: str, parameters=None) -> int:
+        """
+        Record existing IDs from the first column of a query, e.g.
+        `SELECT code FROM invitations`. Rows are streamed from the cursor.
+        """
+
+        cursor = conn.execute(sql, parameters or ())
+        return self.seed(row[0] for row in cursor)
+
+    def __contains__(self, id: str) -> bool:
+
+        return self._may_contain(id)
+
+    def __len__(self) -> int:
+
+        return self._count
+
+    def allocate(self) -> str:
+        """Return a new identifier not previously issued or seeded."""
+
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, n: int) -> list[str]:
+        """Return `n` new identifiers, distinct from each other and from all known IDs."""
+
+        _check_count(n)
+
+        numchars = self.numchars
+        alphabet = self._alphabet
+        # One secrets read covers the first candidate for every ID in the batch
+        pool = _random_alphabet_string(alphabet, n * numchars) if n else ""
+
+        ids = []
+        issued = set()
+        with self._lock:
+            for offset in range(0, n * numchars, numchars):
+                core = pool[offset:offset + numchars]
+                for _ in range(self.max_attempts):
+                    id = f"{self.prefix}{core}{self.suffix}"
+                    if id not in issued and not self._may_contain(id):
+                        issued.add(id)
+                        ids.append(id)
+                        break
+                    self._retries += 1
+                    core = _random_alphabet_string(alphabet, numchars)
+                else:
+                    logger.warning(f"ShortIdAllocator exhausted {self.max_attempts} attempts at saturation {self.saturation:.3f}")
+                    raise RuntimeError(f"Unable to allocate a unique identifier after {self.max_attempts} attempts")
+
+            # Only a fully allocated batch is recorded, so a failure loses no IDs
+            for id in ids:
+                self._remember(id)
+
+        return ids
+
+    @property
+    def saturation(self) -> float:
+        """Fraction of the keyspace already used; roughly the chance a fresh candidate collides."""
+
+        return self._count / self._keyspace
+
+    def stats(self) -> dict:
+
+        return {
+            "count": self._count,
+            "keyspace": self._keyspace,
+            "saturation": self.saturation,
+            "retries": self._retries,
+            "expected_items": self.expected_items,
+            "over_capacity": self._count > self.expected_items,
+            "filters": len(self._filters),
+            "filter_fill_ratio": self._filters[-1].fill_ratio,
+            "filter_false_positive_rate": 1 - math.prod(1 - bloom_filter.false_positive_rate for bloom_filter in self._filters),
+            "exact": self._exact is not None,
+        }
@@ -14,12 +14,373 @@
 
 import logging
 import json
+import re
+import codecs
+import sys
+import threading
+import types
+import uuid
+import sqlite3
+import datetime
+import dataclasses
+import decimal
+import email.utils
+from collections import OrderedDict
+from collections.abc import Mapping
 import json5
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
-def get_json_str_from_dict_or_str(input_item):
+# "auto" tries orjson (if installed) or the stdlib parser first and falls
+# back to json5 only when strict parsing fails; "json5" always uses json5.
+# orjson reads integers beyond 64 bits as floats, so "auto" leaves input
+# with 20+ digit runs to the stdlib parser
+JSON_BACKENDS = ("auto", "orjson", "json", "json5")
+
+_json_backend = "auto"
+
+# Serializers for dumps(): "auto" uses orjson when installed, else stdlib json
+JSON_SERIALIZERS = ("auto", "orjson", "json")
+
+_json_serializer = "auto"
+
+# Defaults for iter_json_array
+_JSON_CHUNK_SIZE = 65536
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+_JSON_LONG_DIGITS = re.compile(r'[0-9]{20}')
+_JSON_LONG_DIGITS_BYTES = re.compile(rb'[0-9]{20}')
+_json_decoder = json.JSONDecoder()
+
+# Default size limit for enable_parse_cache
+_PARSE_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+_parse_cache = None
+
+
+def _check_json_backend(backend):
+
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"JSON backend must be one of: {', '.join(JSON_BACKENDS)}")
+    if backend == "orjson" and orjson is None:
+        raise ValueError("JSON backend 'orjson' requested but orjson is not installed")
+
+
+def set_json_backend(backend):
+
+    global _json_backend
+
+    _check_json_backend(backend)
+    _json_backend = backend
+
+
+def get_json_backend():
+
+    return _json_backend
+
+
+def _check_json_serializer(serializer):
+
+    if serializer not in JSON_SERIALIZERS:
+        raise ValueError(f"JSON serializer must be one of: {', '.join(JSON_SERIALIZERS)}")
+    if serializer == "orjson" and orjson is None:
+        raise ValueError("JSON serializer 'orjson' requested but orjson is not installed")
+
+
+def set_json_serializer(serializer):
+
+    global _json_serializer
+
+    _check_json_serializer(serializer)
+    _json_serializer = serializer
+
+
+def get_json_serializer():
+
+    return _json_serializer
+
+
+def _json_default(obj):
+
+    if isinstance(obj, sqlite3.Row):
+        return dict(zip(obj.keys(), obj))
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _http_date(value):
+
+    # As Flask's default JSON provider: naive values are taken as UTC
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return email.utils.format_datetime(value.astimezone(datetime.timezone.utc), usegmt=True)
+
+
+def _json_default_http_dates(obj):
+
+    if isinstance(obj, datetime.date):
+        return _http_date(obj)
+    return _json_default(obj)
+
+
+def dumps(obj, serializer=None, http_dates=False):
+    """
+    Serialize `obj` to compact UTF-8 JSON bytes.
+
+    Besides the standard JSON types, handles datetime/date/time (ISO 8601),
+    uuid.UUID, decimal.Decimal (as a string), dataclasses, sqlite3.Row (as
+    an object keyed by column name), other mappings and sets. With orjson,
+    datetimes and UUIDs are serialized natively and produce the same text;
+    ints outside orjson's 64-bit range fall back to the stdlib serializer.
+    NaN and infinite floats raise ValueError with the stdlib serializer and
+    become null with orjson.
+
+    Args:
+        obj: Value to serialize.
+        serializer: "auto", "orjson" or "json"; defaults to the global
+            setting (see set_json_serializer()).
+        http_dates: Render datetimes and dates as HTTP dates
+            ("Tue, 02 Jan 2024 03:04:05 GMT"), as Flask's jsonify does.
+    """
+
+    if serializer is None:
+        serializer = _json_serializer
+    else:
+        _check_json_serializer(serializer)
+
+    default = _json_default_http_dates if http_dates else _json_default
+
+    if serializer == "orjson" or (serializer == "auto" and orjson is not None):
+        option = orjson.OPT_NON_STR_KEYS
+        if http_dates:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. ints beyond 64 bits, which the stdlib serializer handles;
+            # anything it cannot handle either raises from there
+            pass
+
+    return json.dumps(obj, default=default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _copy_json(value):
+
+    if type(value) is dict:
+        return {k: _copy_json(v) for k, v in value.items()}
+    if type(value) is list:
+        return [_copy_json(v) for v in value]
+    return value
+
+
+def _freeze_json(value):
+
+    if type(value) is dict:
+        return types.MappingProxyType({k: _freeze_json(v) for k, v in value.items()})
+    if type(value) is list:
+        return tuple(_freeze_json(v) for v in value)
+    return value
+
+
+def _json_size(value):
+    """Estimate the memory held by a parsed JSON value, using sys.getsizeof."""
+
+    size = sys.getsizeof(value)
+    if type(value) is dict:
+        for k, v in value.items():
+            size += sys.getsizeof(k) + _json_size(v)
+    elif type(value) is list:
+        for v in value:
+            size += _json_size(v)
+    return size
+
+
+class _JsonParseCache:
+    """
+    LRU cache of parsed JSON strings, bounded by the estimated total size of
+    the cached source strings and parsed values (as measured by
+    sys.getsizeof) rather than by entry count.
+    """
+
+    def __init__(self, max_bytes, frozen):
+
+        self.max_bytes = max_bytes
+        self.frozen = frozen
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, json_string, backend):
+
+        # The source string is kept and compared, so a hash collision is a miss
+        key = (hash(json_string), len(json_string), backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == json_string:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = entry[1]
+            else:
+                self.misses += 1
+                return None, False
+
+        return (value if self.frozen else _copy_json(value)), True
+
+    def put(self, json_string, backend, value):
+
+        # Frozen copies are close enough in size to the parsed value
+        size = sys.getsizeof(json_string) + _json_size(value)
+        if size > self.max_bytes:
+            return _freeze_json(value) if self.frozen else value
+
+        stored = _freeze_json(value) if self.frozen else value
+        key = (hash(json_string), len(json_string), backend)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (json_string, stored, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+        return stored if self.frozen else _copy_json(value)
+
+    def clear(self):
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "frozen": self.frozen,
+            }
+
+
+def enable_parse_cache(max_bytes=_PARSE_CACHE_MAX_BYTES, frozen=False):
+    """
+    Cache the results of loads() for str inputs (and so of the helpers
+    below), for services that parse the same few JSON strings repeatedly.
+
+    Args:
+        max_bytes: Limit on the estimated memory held by the cache: each
+            entry counts its source string plus its parsed value, as
+            measured by sys.getsizeof. Least recently used entries are
+            evicted beyond it, and a result larger than the whole limit is
+            returned without being cached.
+        frozen: If False, every call returns a fresh copy of the cached
+            value, so callers may mutate it. If True, cached values are
+            stored as read-only MappingProxyType/tuple structures and
+            returned without copying.
+    """
+
+    global _parse_cache
+
+    if max_bytes < 1:
+        raise ValueError("max_bytes must be >= 1")
+    _parse_cache = _JsonParseCache(max_bytes, frozen)
+
+
+def disable_parse_cache():
+
+    global _parse_cache
+
+    _parse_cache = None
+
+
+def clear_parse_cache():
+
+    if _parse_cache is not None:
+        _parse_cache.clear()
+
+
+def get_parse_cache_stats():
+    """Return hit/miss/eviction counters and sizes, or None if the cache is disabled."""
+
+    cache = _parse_cache
+    return cache.stats() if cache is not None else None
+
+
+def _has_long_digits(json_string):
+
+    pattern = _JSON_LONG_DIGITS if isinstance(json_string, str) else _JSON_LONG_DIGITS_BYTES
+    return pattern.search(json_string) is not None
+
+
+def _parse(json_string, backend):
+
+    if backend != "json5":
+        if backend == "orjson" or (backend == "auto" and orjson is not None and not _has_long_digits(json_string)):
+            strict_loads = orjson.loads
+        else:
+            strict_loads = json.loads
+        try:
+            return strict_loads(json_string)
+        except ValueError:
+            pass
+
+    return json5.loads(json_string)
+
+
+def loads(json_string, backend=None):
+    """
+    Parse a JSON (or JSON5) string using the tiered backends.
+
+    Strict JSON is parsed by orjson or the stdlib C parser; only input they
+    reject is passed to json5. Raises ValueError if no backend can parse it.
+    Uses the parse cache when enabled (see enable_parse_cache()).
+    """
+
+    if backend is None:
+        backend = _json_backend
+    else:
+        _check_json_backend(backend)
+
+    cache = _parse_cache
+    if cache is None or not isinstance(json_string, str):
+        return _parse(json_string, backend)
+
+    value, found = cache.get(json_string, backend)
+    if found:
+        return value
+
+    return cache.put(json_string, backend, _parse(json_string, backend))
+
+
+def get_json_str_from_dict_or_str(input_item, backend=None):
 
     if not input_item:
         raise ValueError("input_item must be a non-empty dictionary or a valid JSON string")
@@ -28,7 +389,7 @@ def get_json_str_from_dict_or_str(input_item):
         item_json = json.dumps(input_item)
     elif isinstance(input_item, str):
         try:
-            item_json = json5.loads(input_item)
+            item_json = loads(input_item, backend)
         except ValueError:
             #raise ValueError(f"Invalid JSON string provided: {input_item}")
             raise ValueError("Invalid JSON string provided")
@@ -38,7 +399,7 @@ def get_json_str_from_dict_or_str(input_item):
     return item_json
 
 
-def get_dict_from_dict_or_json_str(input_item):
+def get_dict_from_dict_or_json_str(input_item, backend=None):
 
     if not input_item:
         raise ValueError("input_item must be a non-empty dictionary or a valid JSON string")
@@ -47,7 +408,7 @@ def get_dict_from_dict_or_json_str(input_item):
         return input_item
     elif isinstance(input_item, str):
         try:
-            return json5.loads(input_item)
+            return loads(input_item, backend)
         except ValueError:
             #raise ValueError(f"Invalid JSON string provided: {input_item}")
             raise ValueError("Invalid JSON string provided")
@@ -55,15 +416,210 @@ def get_dict_from_dict_or_json_str(input_item):
         raise TypeError("input_item must be a dictionary or a valid JSON string")
 
 
-def get_list_from_json_string(json_string):
+def get_list_from_json_string(json_string, backend=None):
 
     if json_string is None:
         return None
     try:
-        parsed_data = json5.loads(json_string)
-        if isinstance(parsed_data, list):
+        parsed_data = loads(json_string, backend)
+        # Frozen parse-cache entries hold arrays as tuples
+        if isinstance(parsed_data, (list, tuple)):
             return parsed_data
     except ValueError:
         pass
 
     return None
+
+
+def _iter_text_chunks(source, chunk_size):
+
+    if isinstance(source, str):
+        yield source
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        chunks = (view[i:i + chunk_size] for i in range(0, len(view), chunk_size))
+    elif hasattr(source, "read"):
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        chunks = source
+
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+        else:
+            yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+class _ChunkBuffer:
+    """Text read so far from a chunk iterator, with a parse position."""
+
+    def __init__(self, chunks):
+
+        self._chunks = chunks
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Read more input, at least doubling the unparsed text so an element
+        spanning many chunks is retried a logarithmic number of times.
+        Returns False once the input is exhausted.
+        """
+
+        if self.eof:
+            return False
+        if self.pos > len(self.text) // 2:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+
+        target = max(1, 2 * (len(self.text) - self.pos))
+        parts = [self.text]
+        added = 0
+        for chunk in self._chunks:
+            parts.append(chunk)
+            added += len(chunk)
+            if added >= target:
+                break
+        else:
+            self.eof = True
+        self.text = "".join(parts)
+        return added > 0
+
+    def peek(self):
+        """Skip whitespace and return the next character, or "" at end of input."""
+
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+
+_JSON_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+
+
+def _is_truncated(error, text):
+    """
+    Whether a raw_decode error is only due to the value continuing past the
+    end of `text`, rather than a syntax error within it.
+    """
+
+    if _JSON_WHITESPACE.match(text, error.pos).end() >= len(text):
+        return True
+    if error.msg.startswith("Unterminated string"):
+        return True
+    if _JSON_NUMBER_TAIL.match(text, error.pos).end() == len(text):
+        # e.g. "1." or "2e-": a number whose fraction or exponent is cut off
+        return True
+    rest = text[error.pos:]
+    if error.msg == "Expecting value":
+        return any(literal.startswith(rest) for literal in _JSON_LITERALS)
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        return len(rest) < 6
+    return False
+
+
+def _decode_next_value(buffer):
+
+    while True:
+        try:
+            value, end = _json_decoder.raw_decode(buffer.text, buffer.pos)
+        except json.JSONDecodeError as e:
+            # Only read more input when the value runs past the buffered
+            # text; a syntax error inside it fails without reading the rest
+            if _is_truncated(e, buffer.text) and buffer.fill():
+                continue
+            raise ValueError("Invalid JSON string provided") from None
+        if type(value) in (int, float) and _JSON_NUMBER_TAIL.match(buffer.text, end).end() == len(buffer.text):
+            # A number running to the buffer edge may continue in the next chunk
+            if buffer.fill():
+                continue
+        buffer.pos = end
+        return value
+
+
+def _iter_array_elements(chunks):
+
+    buffer = _ChunkBuffer(chunks)
+
+    if buffer.peek() != "[":
+        raise ValueError("JSON input must be an array")
+    buffer.pos += 1
+
+    if buffer.peek() == "]":
+        buffer.pos += 1
+    else:
+        while True:
+            buffer.peek()
+            yield _decode_next_value(buffer)
+            delimiter = buffer.peek()
+            buffer.pos += 1
+            if delimiter == "]":
+                break
+            if delimiter != ",":
+                raise ValueError("Invalid JSON string provided")
+
+    if buffer.peek():
+        raise ValueError("Invalid JSON string provided")
+
+
+def _iter_ndjson_values(chunks, backend):
+
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield _loads_line(line, backend)
+
+    if pending.strip():
+        yield _loads_line(pending, backend)
+
+
+def _loads_line(line, backend):
+
+    try:
+        return loads(line, backend)
+    except ValueError:
+        raise ValueError("Invalid JSON string provided") from None
+
+
+def iter_json_array(source, ndjson=False, backend=None, chunk_size=_JSON_CHUNK_SIZE):
+    """
+    Yield the elements of a JSON array one at a time, reading the input
+    incrementally rather than parsing it into a list first.
+
+    Args:
+        source: A str, bytes (UTF-8), a file-like object with read(), or an
+            iterable of str/bytes chunks.
+        ndjson: If True, read JSON lines (one value per line, blank lines
+            ignored) instead of a single array. Each line is parsed with
+            loads(), so JSON5 lines are accepted.
+        backend: JSON backend for ndjson lines; see set_json_backend().
+        chunk_size: Read size for bytes and file-like sources.
+
+    Array mode accepts strict JSON only. Raises ValueError for invalid input
+    (after yielding any elements that preceded the error), or if the input
+    is not an array. A None source yields nothing.
+    """
+
+    if source is None:
+        return
+    if backend is not None:
+        _check_json_backend(backend)
+
+    chunks = (chunk for chunk in _iter_text_chunks(source, chunk_size) if chunk)
+
+    if ndjson:
+        yield from _iter_ndjson_values(chunks, backend)
+    else:
+        yield from _iter_array_elements(chunks)
@@ -13,25 +13,47 @@
 # under the License.
 
 import logging
-import inspect
+import logging.handlers
+import atexit
+import contextvars
+import hashlib
+import queue
+import threading
+import time
 import traceback
 import sys
 
 from . import _persistent
 
 from .identifiers import generate_id, generate_shorter_id
+from .json import dumps
 
 
 logger = logging.getLogger(__name__)
 
 
+# Cache of code object -> "module.function" for get_calling_method_text
+_CALLING_METHOD_CACHE_SIZE = 4096
+_calling_method_cache = {}
+
+
 def get_calling_method_text(depth=2):
 
-        stack = inspect.stack()
-        caller_info = stack[depth]
-        calling_method = caller_info.function
-        calling_module = caller_info.frame.f_globals["__name__"]
-        return f"{calling_module}.{calling_method}"
+    # Same result as inspect.stack()[depth], without building every frame
+    # record and reading source context
+    try:
+        frame = sys._getframe(depth)
+    except ValueError:
+        raise IndexError("list index out of range") from None
+
+    code = frame.f_code
+    text = _calling_method_cache.get(code)
+    if text is None:
+        text = f"{frame.f_globals['__name__']}.{code.co_name}"
+        if len(_calling_method_cache) >= _CALLING_METHOD_CACHE_SIZE:
+            _calling_method_cache.clear()
+        _calling_method_cache[code] = text
+    return text
 
 
 def get_calling_method_name_quick(indirect=False):
@@ -53,27 +75,242 @@ def get_exception_details(exception, tbindex=-1):
     return exception_identifier, file_name, line_number, func_name, text
 
 
-def log_exception(client_id, e, calling_method_name=None, include_traceback=True, response_id=None):
+def get_exception_fingerprint(exception):
+    """
+    Return a short hex fingerprint for an exception, from its type and the
+    (module, function, line) of each traceback frame. Repeats of the same
+    failure share a fingerprint; the message text is not included.
+    """
+
+    exception_type = type(exception)
+    parts = [f"{exception_type.__module__}.{exception_type.__qualname__}"]
+    exc_traceback = exception.__traceback__
+    while exc_traceback is not None:
+        code = exc_traceback.tb_frame.f_code
+        parts.append(f"{code.co_filename}:{code.co_name}:{exc_traceback.tb_lineno}")
+        exc_traceback = exc_traceback.tb_next
+
+    return hashlib.blake2b("\n".join(parts).encode(), digest_size=8).hexdigest()
+
+
+class ExceptionDeduper:
+    """
+    Time-windowed rate limiting for log_exception.
+
+    Within each window of `window_seconds`, the first `full_log_count`
+    occurrences of a fingerprint are logged in full. Later occurrences are
+    only counted, and a summary with the count and up to `max_samples`
+    exception identifiers is logged once the window closes: by a daemon
+    thread that runs while summaries are pending, by the next record() call,
+    or by flush_summaries().
+    """
+
+    def __init__(self, full_log_count=5, window_seconds=60.0, max_samples=5, max_fingerprints=1024):
+
+        if full_log_count < 1:
+            raise ValueError("full_log_count must be at least 1")
+        if window_seconds <= 0:
+            raise ValueError("window_seconds must be positive")
+
+        self.full_log_count = full_log_count
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        # fingerprint -> [window_start, count, suppressed, samples, description]
+        self._windows = {}
+        self._suppressed_total = 0
+        self._next_sweep = 0.0
+        self._sweeper = None
+
+    def record(self, fingerprint, exception_identifier, description=""):
+        """Count an occurrence; returns True if it should be logged in full."""
+
+        now = time.monotonic()
+        start_sweeper = False
+        with self._lock:
+            # Close every expired window, not just this fingerprint's
+            summaries = self._close_expired(now) if now >= self._next_sweep else []
+            window = self._windows.get(fingerprint)
+            if window is not None and now - window[0] >= self.window_seconds:
+                summaries.append(self._summary(fingerprint, self._windows.pop(fingerprint), now))
+                window = None
+            if window is None:
+                if len(self._windows) >= self.max_fingerprints:
+                    summaries.extend(self._close_expired(now))
+                if len(self._windows) >= self.max_fingerprints:
+                    # Still full of live windows; forget the oldest one
+                    oldest = min(self._windows, key=lambda key: self._windows[key][0])
+                    summaries.append(self._summary(oldest, self._windows.pop(oldest), now))
+                window = [now, 0, 0, [], description]
+                self._windows[fingerprint] = window
+                self._next_sweep = min(self._next_sweep, now + self.window_seconds)
+
+            window[1] += 1
+            log_in_full = window[1] <= self.full_log_count
+            if not log_in_full:
+                window[2] += 1
+                self._suppressed_total += 1
+                if len(window[3]) < self.max_samples:
+                    window[3].append(exception_identifier)
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._run_sweeper, name="domestique-exception-summaries", daemon=True)
+                    start_sweeper = True
+
+        if start_sweeper:
+            self._sweeper.start()
+        self._log_summaries(summaries)
+        return log_in_full
+
+    def _close_expired(self, now):
+        """Remove expired windows and return their summaries. Caller holds the lock."""
+
+        summaries = []
+        next_sweep = now + self.window_seconds
+        for fingerprint, window in list(self._windows.items()):
+            if now - window[0] >= self.window_seconds:
+                summaries.append(self._summary(fingerprint, window, now))
+                del self._windows[fingerprint]
+            else:
+                next_sweep = min(next_sweep, window[0] + self.window_seconds)
+        self._next_sweep = next_sweep
+        return summaries
+
+    def _run_sweeper(self):
+
+        # Logs summaries when windows close even if no further exceptions
+        # arrive; exits once no window has suppressed occurrences
+        while True:
+            with self._lock:
+                pending = [window[0] for window in self._windows.values() if window[2]]
+                if not pending:
+                    self._sweeper = None
+                    return
+                delay = min(pending) + self.window_seconds - time.monotonic()
+                summaries = self._close_expired(time.monotonic()) if delay <= 0 else []
+            if delay > 0:
+                time.sleep(delay)
+            self._log_summaries(summaries)
+
+    def _log_summaries(self, summaries):
+
+        for summary in summaries:
+            if summary:
+                logger.error(summary)
+
+    def flush_summaries(self):
+        """Log summaries for every window with suppressed occurrences and reset them."""
+
+        now = time.monotonic()
+        with self._lock:
+            summaries = [self._summary(fingerprint, window, now) for fingerprint, window in self._windows.items()]
+            self._windows.clear()
+
+        self._log_summaries(summaries)
+
+    def stats(self):
+
+        with self._lock:
+            return {
+                "fingerprints": len(self._windows),
+                "suppressed": self._suppressed_total,
+                "suppressed_in_window": sum(window[2] for window in self._windows.values()),
+            }
+
+    def _summary(self, fingerprint, window, now):
+
+        window_start, count, suppressed, samples, description = window
+        if not suppressed:
+            return None
+        elapsed = int(now - window_start)
+        return (f"Exception fingerprint {fingerprint} ({description}) occurred {count} times in {elapsed}s, "
+                f"{suppressed} not logged in full - sample IDs: {', '.join(samples)}")
+
+
+_exception_deduper = None
+
+
+def set_exception_deduper(deduper):
+    """Rate-limit log_exception with an ExceptionDeduper, or pass None to log every exception in full."""
+
+    global _exception_deduper
+
+    if deduper is not None and not isinstance(deduper, ExceptionDeduper):
+        raise TypeError("deduper must be an ExceptionDeduper or None")
+
+    if _exception_deduper is not None and _exception_deduper is not deduper:
+        _exception_deduper.flush_summaries()
+    _exception_deduper = deduper
+
+
+def get_exception_deduper():
+
+    return _exception_deduper
 
-    def append_traceback():
 
-        tb_lines = ""
-        tb_line = 0
-        exc_traceback = e.__traceback__
+class ExceptionDetails:
+    """
+    Lazy log message for the details of an exception.
 
+    Holds the exception and its traceback, and renders the multi-line
+    details block only when a handler formats the record, so nothing is
+    extracted or formatted for records that are filtered out.
+    """
+
+    __slots__ = ("exception", "exception_traceback", "exception_identifier", "response_id", "include_traceback", "_text")
+
+    def __init__(self, exception, exception_identifier, response_id=None, include_traceback=True):
+
+        self.exception = exception
+        # Re-raising prepends new entries; the chain from this head stays fixed
+        self.exception_traceback = exception.__traceback__
+        self.exception_identifier = exception_identifier
+        self.response_id = response_id
+        self.include_traceback = include_traceback
+        self._text = None
+
+    def __str__(self):
+
+        if self._text is None:
+            self._text = self._render()
+        return self._text
+
+    def _render(self):
+
+        exception_identifier = self.exception_identifier
+        if self.response_id:
+            header = f"Details for exception ID {exception_identifier} [response ID: {self.response_id}]:"
+        else:
+            header = f"Details for exception ID {exception_identifier}:"
+
+        parts = [header]
+        frame_lines = []
+        last_traceback = None
+        exc_traceback = self.exception_traceback
         while exc_traceback is not None:
-            frame = exc_traceback.tb_frame
-            filename = frame.f_code.co_filename
-            lineno = exc_traceback.tb_lineno
-            function = frame.f_code.co_name
-            module = frame.f_globals['__name__']
-            tb_lines += f"{line_prefix}traceback[{tb_line}] {module}.{function} - {filename},{lineno}"
-            tb_line += 1
+            if self.include_traceback:
+                code = exc_traceback.tb_frame.f_code
+                module = exc_traceback.tb_frame.f_globals['__name__']
+                frame_lines.append(f"traceback[{len(frame_lines)}] {module}.{code.co_name} - {code.co_filename},{exc_traceback.tb_lineno}")
+            last_traceback = exc_traceback
             exc_traceback = exc_traceback.tb_next
-    
-        return tb_lines
 
-    exception_identifier, file_name, line_number, func_name, text = get_exception_details(e)
+        # Only the innermost frame needs its source line looked up
+        if last_traceback is not None:
+            file_name, line_number, func_name, text = traceback.extract_tb(last_traceback)[0]
+            parts.append(f"File: {file_name}")
+            parts.append(f"Line: {line_number}")
+            parts.append(f"Function: {func_name}")
+            parts.append(f"Error line: {text}")
+        parts.append(f"Error message: {self.exception}")
+        parts.extend(frame_lines)
+
+        return f"\n {exception_identifier} - ".join(parts)
+
+
+def log_exception(client_id, e, calling_method_name=None, include_traceback=True, response_id=None):
+
+    exception_identifier = generate_shorter_id()
 
     if isinstance(e, (ValueError, TypeError)):
         message_for_user = f"{e}"
@@ -83,28 +320,386 @@ def log_exception(client_id, e, calling_method_name=None, include_traceback=True
     if not calling_method_name:
         calling_method_name = get_calling_method_name_quick(True)
 
+    deduper = _exception_deduper
+    log_in_full = True
+    if deduper is not None:
+        description = f"{type(e).__name__} in '{calling_method_name}'"
+        log_in_full = deduper.record(get_exception_fingerprint(e), exception_identifier, description)
+
     if client_id:
         message = f"An error occurred for client_id '{client_id}' in '{calling_method_name}' - {message_for_user}"
     else:
         message = f"An error occurred in '{calling_method_name}' - {message_for_user}"
-    logger.exception(message, exc_info=False)
 
-    details = f"Details for exception ID {exception_identifier}"
+    if not log_in_full:
+        return message, exception_identifier
+
+    extra = {"exception_identifier": exception_identifier}
     if response_id:
-        details += f" [response ID: {response_id}]:"
-    else:
-        details += ":"
-    
-    line_prefix = f"\n {exception_identifier} - "
-    details += line_prefix + f"File: {file_name}"
-    details += line_prefix + f"Line: {line_number}"
-    details += line_prefix + f"Function: {func_name}"
-    details += line_prefix + f"Error line: {text}"
-    details += line_prefix + f"Error message: {e}"
-
-    if include_traceback:
-        details += append_traceback()
-    
-    logger.error(details)
+        extra["response_id"] = response_id
+    logger.exception(message, exc_info=False, extra=extra)
+
+    # The details are rendered only if a handler emits the record
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error(ExceptionDetails(e, exception_identifier, response_id, include_traceback), extra=extra)
 
     return message, exception_identifier
+
+
+# Fields of the request being handled, set by the Flask Session and FastAPI SessionContext
+_request_context = contextvars.ContextVar("domestique_request_context", default=None)
+
+
+def set_request_context(**fields):
+    """
+    Merge `fields` (e.g. response_id, client_id, handler) into the request
+    context for the current thread or task. Returns a token for
+    reset_request_context().
+    """
+
+    current = _request_context.get()
+    if current:
+        fields = {**current, **fields}
+    return _request_context.set(fields)
+
+
+def new_request_context(**fields):
+    """As set_request_context(), but replacing any fields left from earlier requests."""
+
+    return _request_context.set(fields)
+
+
+def get_request_context():
+
+    return _request_context.get() or {}
+
+
+def reset_request_context(token=None):
+    """Restore the context from before set_request_context() returned `token`, or clear it."""
+
+    if token is None:
+        _request_context.set(None)
+        return
+    try:
+        _request_context.reset(token)
+    except (ValueError, RuntimeError):
+        # Token already used, or created in another context (e.g. another task)
+        _request_context.set(None)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Copies the request context onto each record as attributes, without
+    overwriting attributes the record already has (such as `extra` values).
+
+    Add it to handlers, or to the queue handler of a LogPipeline (done by
+    default), so it runs on the thread or task that created the record.
+    """
+
+    def filter(self, record):
+
+        context = _request_context.get()
+        if context:
+            attributes = record.__dict__
+            for key, value in context.items():
+                if key not in attributes:
+                    attributes[key] = value
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one-line JSON objects for log shippers.
+
+    Args:
+        fields: Record attributes to include when present, in addition to
+            timestamp_ms, level, logger and message.
+        static_fields: Constant fields added to every object (e.g. service name).
+    """
+
+    DEFAULT_FIELDS = ("response_id", "client_id", "handler", "exception_identifier")
+
+    def __init__(self, fields=DEFAULT_FIELDS, static_fields=None):
+
+        super().__init__()
+        self.fields = tuple(fields)
+        self.static_fields = dict(static_fields) if static_fields else {}
+
+    def format(self, record):
+
+        entry = {
+            "timestamp_ms": int(record.created * 1000),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if self.static_fields:
+            entry.update(self.static_fields)
+
+        attributes = record.__dict__
+        for field in self.fields:
+            value = attributes.get(field)
+            if value is not None:
+                entry[field] = value
+
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+
+        try:
+            return dumps(entry).decode("utf-8")
+        except (TypeError, ValueError):
+            # Unserializable or non-finite values are logged as their str()
+            return dumps({key: value if isinstance(value, (str, int, bool)) else str(value) for key, value in entry.items()}).decode("utf-8")
+
+
+LOG_OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_debug")
+
+
+class _PipelineQueueHandler(logging.handlers.QueueHandler):
+
+    def __init__(self, log_queue, pipeline):
+
+        super().__init__(log_queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record):
+
+        # Leave ExceptionDetails unrendered; the listener's handlers format it
+        if isinstance(record.msg, ExceptionDetails) and not record.args and not record.exc_info:
+            return record
+        return super().prepare(record)
+
+    def enqueue(self, record):
+
+        self.pipeline._enqueue(record)
+
+
+class _PipelineQueueListener(logging.handlers.QueueListener):
+
+    def enqueue_sentinel(self):
+
+        # The queue may be full; wait for room rather than raise queue.Full
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """
+    Routes log records through a bounded queue drained by a background
+    QueueListener, so handler I/O happens off the request threads and the
+    event loop.
+
+    Args:
+        handlers: Handlers the listener dispatches to. Defaults to the root
+            logger's handlers at start().
+        logger_names: Loggers whose records go through the queue. They stop
+            propagating while the pipeline runs.
+        max_queue_size: Capacity of the queue.
+        overflow: What to do when the queue is full:
+            "block" - wait for room (up to block_timeout seconds, then drop),
+            "drop_oldest" - discard the oldest queued record,
+            "drop_debug" - discard a queued DEBUG record (or the new record if
+            it is DEBUG), falling back to the oldest record.
+        block_timeout: Seconds to wait under "block"; None waits indefinitely.
+    """
+
+    def __init__(self, handlers=None, logger_names=("domestique",), max_queue_size=10000, overflow="block", block_timeout=None):
+
+        if overflow not in LOG_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', expected one of: {', '.join(LOG_OVERFLOW_POLICIES)}")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be at least 1")
+
+        self.handlers = list(handlers) if handlers is not None else None
+        self.logger_names = tuple(logger_names)
+        self.max_queue_size = max_queue_size
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self._queue = queue.Queue(max_queue_size)
+        self._queue_handler = _PipelineQueueHandler(self._queue, self)
+        # The context var is only visible on the thread or task logging the record
+        self._queue_handler.addFilter(RequestContextFilter())
+        self._listener = None
+        self._saved_propagate = {}
+        self._counter_lock = threading.Lock()
+        self._dropped = 0
+        self._dropped_debug = 0
+        self._blocked = 0
+
+    @property
+    def running(self):
+
+        return self._listener is not None
+
+    def start(self):
+
+        if self._listener is not None:
+            raise RuntimeError("Log pipeline is already running")
+
+        handlers = self.handlers if self.handlers is not None else list(logging.getLogger().handlers)
+        self._listener = _PipelineQueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+
+        for name in self.logger_names:
+            target = logging.getLogger(name)
+            self._saved_propagate[name] = target.propagate
+            target.addHandler(self._queue_handler)
+            target.propagate = False
+
+        return self
+
+    def stop(self):
+        """Detach from the loggers and write out every queued record."""
+
+        if self._listener is None:
+            return
+
+        for name in self.logger_names:
+            target = logging.getLogger(name)
+            target.removeHandler(self._queue_handler)
+            target.propagate = self._saved_propagate.pop(name, True)
+
+        self._listener.stop()
+        self._listener = None
+        for handler in self._handlers():
+            handler.flush()
+
+    def flush(self, timeout=None):
+        """Wait until the listener has handled every queued record. Returns False on timeout."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+
+        for handler in self._handlers():
+            handler.flush()
+        return True
+
+    def stats(self):
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            "overflow": self.overflow,
+            "dropped": self._dropped,
+            "dropped_debug": self._dropped_debug,
+            "blocked": self._blocked,
+        }
+
+    def _handlers(self):
+
+        if self._listener is not None:
+            return self._listener.handlers
+        return self.handlers or ()
+
+    def _count_drop(self, record):
+
+        with self._counter_lock:
+            self._dropped += 1
+            if record.levelno <= logging.DEBUG:
+                self._dropped_debug += 1
+
+    def _enqueue(self, record):
+
+        log_queue = self._queue
+        try:
+            log_queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow == "block":
+            with self._counter_lock:
+                self._blocked += 1
+            try:
+                log_queue.put(record, timeout=self.block_timeout)
+            except queue.Full:
+                self._count_drop(record)
+            return
+
+        if self.overflow == "drop_debug" and record.levelno <= logging.DEBUG:
+            self._count_drop(record)
+            return
+
+        # Evict to make room; other threads may refill it, so retry briefly
+        for _ in range(3):
+            evicted = self._evict(prefer_debug=self.overflow == "drop_debug")
+            if evicted is not None:
+                self._count_drop(evicted)
+            try:
+                log_queue.put_nowait(record)
+                return
+            except queue.Full:
+                continue
+
+        self._count_drop(record)
+
+    def _evict(self, prefer_debug):
+
+        log_queue = self._queue
+        with log_queue.mutex:
+            items = log_queue.queue
+            if not items:
+                return None
+            index = 0
+            if prefer_debug:
+                for i, item in enumerate(items):
+                    if getattr(item, "levelno", logging.NOTSET) <= logging.DEBUG:
+                        index = i
+                        break
+            evicted = items[index]
+            del items[index]
+            log_queue.unfinished_tasks -= 1
+            if not log_queue.unfinished_tasks:
+                log_queue.all_tasks_done.notify_all()
+            log_queue.not_full.notify()
+        return evicted
+
+
+_log_pipeline = None
+
+
+def start_log_pipeline(handlers=None, logger_names=("domestique",), max_queue_size=10000, overflow="block", block_timeout=None):
+    """
+    Start a LogPipeline for domestique's loggers (see LogPipeline for the
+    arguments). It is stopped, and its queue written out, at interpreter exit.
+    """
+
+    global _log_pipeline
+
+    if _log_pipeline is not None and _log_pipeline.running:
+        raise RuntimeError("Log pipeline is already running")
+
+    _log_pipeline = LogPipeline(handlers=handlers, logger_names=logger_names, max_queue_size=max_queue_size, overflow=overflow, block_timeout=block_timeout)
+    _log_pipeline.start()
+
+    return _log_pipeline
+
+
+def stop_log_pipeline():
+
+    global _log_pipeline
+
+    if _exception_deduper is not None:
+        _exception_deduper.flush_summaries()
+
+    if _log_pipeline is not None:
+        _log_pipeline.stop()
+        _log_pipeline = None
+
+
+def get_log_pipeline():
+
+    return _log_pipeline
+
+
+atexit.register(stop_log_pipeline)
@@ -0,0 +1,434 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+In-process metrics: labelled counters and latency histograms, exportable as
+Prometheus text or JSON.
+
+Histograms use a fixed log-linear bucket layout (HDR-style): values are
+recorded in microseconds, exactly below 32us and within 1/16 (~6%)
+above, up to ~19 hours, in 528 buckets. Each series is split into stripes
+chosen per thread, so concurrent requests rarely wait on the same lock.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+
+from .json import dumps
+
+
+logger = logging.getLogger(__name__)
+
+
+REQUESTS_TOTAL = "domestique_requests_total"
+REQUEST_DURATION_MS = "domestique_request_duration_ms"
+
+# Cumulative bucket bounds used for Prometheus export
+DEFAULT_EXPORT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+_SUB_BUCKET_BITS = 5
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+_MAX_VALUE_BITS = 36
+BUCKET_COUNT = _SUB_BUCKET_COUNT + (_MAX_VALUE_BITS - _SUB_BUCKET_BITS) * _SUB_BUCKET_HALF
+
+_STRIPES = 8
+_stripe_counter = itertools.count()
+_thread_local = threading.local()
+
+
+def bucket_index(value_us: int) -> int:
+    """Return the histogram bucket for a non-negative value in microseconds."""
+
+    if value_us < _SUB_BUCKET_COUNT:
+        return value_us
+    bits = value_us.bit_length()
+    if bits > _MAX_VALUE_BITS:
+        return BUCKET_COUNT - 1
+    shift = bits - _SUB_BUCKET_BITS
+    return _SUB_BUCKET_COUNT + (shift - 1) * _SUB_BUCKET_HALF + (value_us >> shift) - _SUB_BUCKET_HALF
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Return the largest value in microseconds that falls in bucket `index`."""
+
+    if index < _SUB_BUCKET_COUNT:
+        return index
+    offset = index - _SUB_BUCKET_COUNT
+    shift = offset // _SUB_BUCKET_HALF + 1
+    mantissa = offset % _SUB_BUCKET_HALF + _SUB_BUCKET_HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+def _stripe_index():
+
+    index = getattr(_thread_local, "stripe", None)
+    if index is None:
+        index = _thread_local.stripe = next(_stripe_counter) % _STRIPES
+    return index
+
+
+class _HistogramStripe:
+
+    __slots__ = ("lock", "counts", "count", "sum_us", "min_us", "max_us")
+
+    def __init__(self):
+
+        self.lock = threading.Lock()
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+
+class Histogram:
+    """A fixed-memory latency histogram; see the module docstring for the layout."""
+
+    __slots__ = ("name", "labels", "_stripes", "_lock")
+
+    def __init__(self, name, labels=()):
+
+        self.name = name
+        self.labels = labels
+        # Stripes are allocated on first use by a thread mapped to them
+        self._stripes = [None] * _STRIPES
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms):
+
+        value_us = int(value_ms * 1000) if value_ms > 0 else 0
+        index = _stripe_index()
+        stripe = self._stripes[index]
+        if stripe is None:
+            with self._lock:
+                stripe = self._stripes[index]
+                if stripe is None:
+                    stripe = self._stripes[index] = _HistogramStripe()
+
+        with stripe.lock:
+            stripe.counts[bucket_index(value_us)] += 1
+            stripe.count += 1
+            stripe.sum_us += value_us
+            if stripe.min_us is None or value_us < stripe.min_us:
+                stripe.min_us = value_us
+            if value_us > stripe.max_us:
+                stripe.max_us = value_us
+
+    def merged(self):
+        """Return (counts, count, sum_us, min_us, max_us) across all stripes."""
+
+        counts = [0] * BUCKET_COUNT
+        count = sum_us = max_us = 0
+        min_us = None
+        for stripe in self._stripes:
+            if stripe is None:
+                continue
+            with stripe.lock:
+                stripe_counts = stripe.counts[:]
+                count += stripe.count
+                sum_us += stripe.sum_us
+                if stripe.min_us is not None and (min_us is None or stripe.min_us < min_us):
+                    min_us = stripe.min_us
+                max_us = max(max_us, stripe.max_us)
+            counts = [a + b for a, b in zip(counts, stripe_counts)]
+        return counts, count, sum_us, min_us, max_us
+
+
+class Counter:
+
+    __slots__ = ("name", "labels", "_values", "_locks")
+
+    def __init__(self, name, labels=()):
+
+        self.name = name
+        self.labels = labels
+        self._values = [0] * _STRIPES
+        self._locks = [threading.Lock() for _ in range(_STRIPES)]
+
+    def increment(self, amount=1):
+
+        index = _stripe_index()
+        with self._locks[index]:
+            self._values[index] += amount
+
+    @property
+    def value(self):
+
+        return sum(self._values)
+
+
+def quantile(counts, count, min_us, max_us, q):
+    """Estimate quantile `q` (0-1) in milliseconds from merged histogram counts."""
+
+    if not count:
+        return None
+    rank = max(1, int(q * count + 0.5))
+    seen = 0
+    for index, bucket_count in enumerate(counts):
+        seen += bucket_count
+        if seen >= rank:
+            value_us = min(max(bucket_upper_bound(index), min_us or 0), max_us)
+            return value_us / 1000
+    return max_us / 1000
+
+
+def _escape_label_value(value):
+
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=None):
+
+    pairs = list(labels)
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in pairs) + "}"
+
+
+def _format_number(value):
+
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def render_prometheus(counters, histograms, export_buckets_ms=DEFAULT_EXPORT_BUCKETS_MS, help_text=None):
+    """
+    Render Prometheus text exposition format.
+
+    Args:
+        counters: Iterable of (name, labels, value).
+        histograms: Iterable of (name, labels, counts, count, sum_us), with
+            counts in the bucket layout of this module.
+    """
+
+    help_text = help_text or {}
+    bounds_us = [bound * 1000 for bound in export_buckets_ms]
+    lines = []
+
+    current = None
+    for name, labels, value in sorted(counters, key=lambda item: (item[0], item[1])):
+        if name != current:
+            current = name
+            if name in help_text:
+                lines.append(f"# HELP {name} {help_text[name]}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+
+    current = None
+    for name, labels, counts, count, sum_us in sorted(histograms, key=lambda item: (item[0], item[1])):
+        if name != current:
+            current = name
+            if name in help_text:
+                lines.append(f"# HELP {name} {help_text[name]}")
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        bound_position = 0
+        bucket_lines = []
+        for index, bucket_count in enumerate(counts):
+            upper_us = bucket_upper_bound(index)
+            while bound_position < len(bounds_us) and upper_us > bounds_us[bound_position]:
+                bucket_lines.append((export_buckets_ms[bound_position], cumulative))
+                bound_position += 1
+            cumulative += bucket_count
+        while bound_position < len(bounds_us):
+            bucket_lines.append((export_buckets_ms[bound_position], cumulative))
+            bound_position += 1
+        for bound, bucket_total in bucket_lines:
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_number(bound)))} {bucket_total}")
+        lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(sum_us / 1000)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def histogram_summary(counts, count, sum_us, min_us, max_us, quantiles=(0.5, 0.9, 0.99)):
+
+    summary = {
+        "count": count,
+        "sum_ms": sum_us / 1000,
+        "min_ms": min_us / 1000 if min_us is not None else None,
+        "max_ms": max_us / 1000 if count else None,
+        "mean_ms": round(sum_us / count / 1000, 3) if count else None,
+    }
+    for q in quantiles:
+        summary[f"p{_format_number(q * 100)}_ms"] = quantile(counts, count, min_us, max_us, q)
+    return summary
+
+
+DEFAULT_HELP_TEXT = {
+    REQUESTS_TOTAL: "Requests handled, by handler, status and client.",
+    REQUEST_DURATION_MS: "Request handling time in milliseconds, by handler and status.",
+}
+
+
+class MetricsExporter:
+    """
+    Snapshot and export methods shared by metrics backends. Subclasses
+    implement _collect(), returning (counters, histograms) as lists of
+    (name, labels, value) and (name, labels, counts, count, sum_us, min_us,
+    max_us).
+    """
+
+    def __init__(self, export_buckets_ms=DEFAULT_EXPORT_BUCKETS_MS):
+
+        self.export_buckets_ms = tuple(export_buckets_ms)
+        self.help_text = dict(DEFAULT_HELP_TEXT)
+
+    def _collect(self):
+
+        raise NotImplementedError
+
+    def describe(self, name, help_text):
+
+        self.help_text[name] = help_text
+
+    def snapshot(self):
+        """Return counters and histogram summaries as a JSON-serializable dict."""
+
+        counters, histograms = self._collect()
+        return {
+            "counters": [{"name": name, "labels": dict(labels), "value": value} for name, labels, value in counters],
+            "histograms": [{"name": name, "labels": dict(labels), **histogram_summary(counts, count, sum_us, min_us, max_us)}
+                           for name, labels, counts, count, sum_us, min_us, max_us in histograms],
+        }
+
+    def to_json(self):
+
+        return dumps(self.snapshot()).decode("utf-8")
+
+    def to_prometheus(self):
+
+        counters, histograms = self._collect()
+        return render_prometheus(
+            counters,
+            [(name, labels, counts, count, sum_us) for name, labels, counts, count, sum_us, _, _ in histograms],
+            self.export_buckets_ms,
+            self.help_text,
+        )
+
+
+class MetricsRegistry(MetricsExporter):
+    """
+    Labelled counters and histograms for this process.
+
+    Series are created on first use and looked up without locking after
+    that. At most `max_series` series are kept; updates for new series
+    beyond that are counted in stats()["dropped_updates"] and discarded,
+    which guards against unbounded label values such as client IDs.
+    """
+
+    def __init__(self, max_series=10000, export_buckets_ms=DEFAULT_EXPORT_BUCKETS_MS):
+
+        super().__init__(export_buckets_ms)
+        self.max_series = max_series
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._dropped_updates = 0
+
+    def _series(self, table, factory, name, labels):
+
+        key = (name, tuple(sorted(labels.items())))
+        series = table.get(key)
+        if series is None:
+            with self._lock:
+                series = table.get(key)
+                if series is None:
+                    if len(self._counters) + len(self._histograms) >= self.max_series:
+                        self._dropped_updates += 1
+                        return None
+                    series = table[key] = factory(name, key[1])
+        return series
+
+    def increment(self, name, amount=1, **labels):
+
+        counter = self._series(self._counters, Counter, name, labels)
+        if counter is not None:
+            counter.increment(amount)
+
+    def observe(self, name, value_ms, **labels):
+
+        histogram = self._series(self._histograms, Histogram, name, labels)
+        if histogram is not None:
+            histogram.observe(value_ms)
+
+    def reset(self):
+
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+            self._dropped_updates = 0
+
+    def stats(self):
+
+        return {
+            "counters": len(self._counters),
+            "histograms": len(self._histograms),
+            "max_series": self.max_series,
+            "dropped_updates": self._dropped_updates,
+        }
+
+    def _collect(self):
+
+        counters = [(counter.name, counter.labels, counter.value) for counter in list(self._counters.values())]
+        histograms = [(histogram.name, histogram.labels, *histogram.merged()) for histogram in list(self._histograms.values())]
+        return counters, histograms
+
+
+_metrics_registry = MetricsRegistry()
+
+
+def set_metrics_registry(registry):
+    """
+    Set the registry fed by route_decorator and the Flask Session, or None
+    to disable. Any object with increment() and observe() methods like
+    MetricsRegistry's can be used, e.g. a SharedMemoryMetrics.
+    """
+
+    global _metrics_registry
+    _metrics_registry = registry
+
+
+def get_metrics_registry():
+
+    return _metrics_registry
+
+
+def record_request(handler, status, client_id, duration_ms):
+    """
+    Count a handled request and record its duration in the current registry.
+    Only the counter is labelled by client; the histogram is labelled by
+    handler and status so its series count does not grow with the client base.
+    """
+
+    registry = _metrics_registry
+    if registry is None:
+        return
+
+    try:
+        status = str(status)
+        client = client_id or ""
+        registry.increment(REQUESTS_TOTAL, handler=handler, status=status, client=client)
+        registry.observe(REQUEST_DURATION_MS, duration_ms, handler=handler, status=status)
+    except Exception:
+        # Metrics must never fail a request
+        logger.exception("Error recording request metrics")
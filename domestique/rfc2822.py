@@ -13,12 +13,23 @@
 # under the License.
 
 import logging
+import re
+from email.utils import parseaddr
+from functools import lru_cache
 
 #from .text import tidy_and_truncate_string
 
 logger = logging.getLogger(__name__)
 
 
+# Tokens of a raw address header: quoted strings, comments and angle-addrs
+# may contain commas, so only commas outside them separate addresses
+_HEADER_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"?|\((?:[^()\\]|\\.)*\)?|<[^>]*>?|[^,"(<]+|,')
+
+# Default per-parser cache size for RFCAddressParser
+_ADDRESS_CACHE_SIZE = 8192
+
+
 def parse_rfc_address(data):
 
     if data is None:
@@ -47,8 +58,8 @@ def parse_rfc_address(data):
 
 def parse_rfc_address_list(address_list):
 
-    parsed_addresses = [parse_rfc_address(address) for address in address_list if parse_rfc_address(address) is not None]
-    
+    parsed_addresses = [parsed for parsed in map(parse_rfc_address, address_list) if parsed is not None]
+
     return parsed_addresses if parsed_addresses else []
 
 
@@ -56,3 +67,116 @@ def format_rfc_addresses(address_list):
  
     parsed_addresses = parse_rfc_address_list(address_list)
     return ', '.join(parsed_addresses)
+
+
+def _split_header(header):
+
+    element = []
+    for token in _HEADER_TOKEN.findall(header):
+        if token == ',':
+            yield ''.join(element)
+            element = []
+        else:
+            element.append(token)
+    yield ''.join(element)
+
+
+class RFCAddressParser:
+    """
+    Bulk address parsing for raw To/Cc headers, batches of headers and
+    lists of address dicts, with memoization of repeated addresses.
+
+    Raw headers are split on commas outside quoted strings, comments and
+    angle brackets, and each address is parsed with email.utils.parseaddr
+    through a bounded LRU cache, so addresses repeated across messages are
+    parsed once. Results are formatted as parse_rfc_address() formats a
+    {'personal': ..., 'address': ...} dict.
+
+    Args:
+        cache_size: Maximum number of distinct addresses memoized.
+    """
+
+    def __init__(self, cache_size=_ADDRESS_CACHE_SIZE):
+
+        self._parse_element = lru_cache(maxsize=cache_size)(self._parse_element_uncached)
+
+    @staticmethod
+    def _parse_element_uncached(element):
+
+        personal, address = parseaddr(element)
+        if not personal and not address:
+            return None
+        return address.lower(), parse_rfc_address({'personal': personal, 'address': address})
+
+    def _iter_parsed(self, source):
+
+        parse_element = self._parse_element
+        if isinstance(source, str):
+            for element in _split_header(source):
+                if element and not element.isspace():
+                    parsed = parse_element(element.strip())
+                    if parsed is not None:
+                        yield parsed
+        else:
+            for item in source:
+                formatted = parse_rfc_address(item)
+                if formatted is not None:
+                    key = item.get('address', '').lower() if isinstance(item, dict) else formatted.lower()
+                    yield key or formatted, formatted
+
+    def iter_addresses(self, source, unique=False):
+        """
+        Yield formatted addresses from a raw header string, or from a list
+        of dicts/strings as accepted by parse_rfc_address_list().
+
+        With unique=True, later repeats of an address (compared
+        case-insensitively) are skipped.
+        """
+
+        if source is None:
+            return
+        if not unique:
+            for _, formatted in self._iter_parsed(source):
+                yield formatted
+            return
+        seen = set()
+        for key, formatted in self._iter_parsed(source):
+            if key not in seen:
+                seen.add(key)
+                yield formatted
+
+    def parse_header(self, header, unique=False):
+
+        return list(self.iter_addresses(header, unique=unique))
+
+    def parse_headers(self, headers, unique=False):
+        """Parse a batch of raw headers, returning one list of addresses per header."""
+
+        return [self.parse_header(header, unique=unique) for header in headers]
+
+    def parse_list(self, address_list, unique=False):
+
+        return list(self.iter_addresses(address_list, unique=unique))
+
+    def iter_formatted(self, source, separator=', ', unique=False):
+        """
+        Stream the output of format_rfc_addresses() in pieces, for address
+        lists too large to join in one string.
+        """
+
+        pieces = self.iter_addresses(source, unique=unique)
+        first = next(pieces, None)
+        if first is None:
+            return
+        yield first
+        for formatted in pieces:
+            yield separator + formatted
+
+    def stats(self):
+
+        info = self._parse_element.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "entries": info.currsize, "max_entries": info.maxsize}
+
+    def clear_cache(self):
+
+        self._parse_element.cache_clear()
@@ -0,0 +1,479 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""
+Metrics backend in multiprocessing.shared_memory, for servers running
+several worker processes (gunicorn, uvicorn --workers).
+
+The segment holds one fixed-layout slot per worker. A worker claims a free
+slot on its first update and writes only to that slot, so updates need no
+cross-process locking. Any process attached to the segment can aggregate
+all slots for a scrape by reading them directly. When a worker exits, or is
+found dead when a slot is claimed, its totals are folded into a reserved
+slot so counters do not go backwards.
+
+Use it in place of the default registry:
+
+    set_metrics_registry(SharedMemoryMetrics("myapp_metrics"))
+
+Create the segment with create=True in a parent process that outlives the
+workers (e.g. a gunicorn on_starting hook) to have it unlinked when that
+process exits. Otherwise the first worker creates it and the last worker to
+exit unlinks it.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory, util
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from .json import dumps, loads
+from .metrics import BUCKET_COUNT, DEFAULT_EXPORT_BUCKETS_MS, MetricsExporter, bucket_index
+
+
+logger = logging.getLogger(__name__)
+
+
+_MAGIC = int.from_bytes(b"DQMETRC1", "little")
+_LAYOUT_VERSION = 1
+_HEADER_WORDS = 8
+_SLOT_HEADER_WORDS = 4
+# Histogram entry data: count, sum_us, min_us, max_us, then the buckets
+_HISTOGRAM_DATA_WORDS = 4 + BUCKET_COUNT
+_NO_MINIMUM = (1 << 64) - 1
+
+# Guards slot claims within a process; recreated in forked children
+_claim_lock = threading.Lock()
+
+
+def _reset_claim_lock():
+
+    global _claim_lock
+    _claim_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_claim_lock)
+
+
+def _pid_alive(pid):
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedMemoryMetrics(MetricsExporter):
+    """
+    Counters and histograms in a shared memory segment, aggregated across
+    worker processes. Has the same increment()/observe()/snapshot()/
+    to_json()/to_prometheus() interface as MetricsRegistry.
+
+    Args:
+        name: Name of the shared memory segment.
+        create: True to create the segment (and unlink it when this process
+            exits), False to attach to an existing one, None to attach or
+            create as needed.
+        max_workers: Number of worker slots. A process that finds every
+            slot taken logs a warning and drops its updates, counting them
+            in stats().
+        max_counters, max_histograms: Series per worker slot. Updates for
+            further series are dropped and counted in stats(). Each
+            histogram takes ~4.5KB per slot; pages never written to are not
+            backed by memory.
+        key_size: Maximum bytes for a series' encoded name and labels.
+    """
+
+    def __init__(self, name="domestique_metrics", create=None, max_workers=32, max_counters=128, max_histograms=32,
+                 key_size=256, export_buckets_ms=DEFAULT_EXPORT_BUCKETS_MS):
+
+        super().__init__(export_buckets_ms)
+
+        self.name = name
+        self.max_workers = max_workers
+        self.max_counters = max_counters
+        self.max_histograms = max_histograms
+        self.key_words = -(-key_size // 8)
+        self.key_size = self.key_words * 8
+
+        self._counter_words = self.key_words + 1
+        self._histogram_words = self.key_words + _HISTOGRAM_DATA_WORDS
+        self._histograms_start = _SLOT_HEADER_WORDS + max_counters * self._counter_words
+        self._slot_words = self._histograms_start + max_histograms * self._histogram_words
+        size = (_HEADER_WORDS + (max_workers + 1) * self._slot_words) * 8
+
+        self._shm, created = self._open(create, size)
+        self._owner = bool(create)
+        self._words = self._shm.buf.cast("Q")
+        if created:
+            self._write_header()
+        else:
+            self._check_header()
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._slot = None
+        self._counter_offsets = {}
+        self._histogram_offsets = {}
+        self._dropped_updates = 0
+        self._closed = False
+
+        atexit.register(self.close)
+
+    def _open(self, create, size):
+
+        if create is None:
+            try:
+                shm = shared_memory.SharedMemory(self.name)
+                created = False
+            except FileNotFoundError:
+                try:
+                    shm = shared_memory.SharedMemory(self.name, create=True, size=size)
+                    created = True
+                except FileExistsError:
+                    shm = shared_memory.SharedMemory(self.name)
+                    created = False
+        else:
+            shm = shared_memory.SharedMemory(self.name, create=create, size=size if create else 0)
+            created = create
+
+        # Unlinking is managed here; stop the resource tracker unlinking the
+        # segment when whichever process registered it exits
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+
+        if shm.size < size:
+            shm.close()
+            raise ValueError(f"Shared memory segment '{self.name}' is smaller than this layout requires")
+
+        return shm, created
+
+    def _layout(self):
+
+        return [_MAGIC, _LAYOUT_VERSION, self.max_workers, self.max_counters, self.max_histograms, self.key_words]
+
+    def _write_header(self):
+
+        words = self._words
+        for index, value in enumerate(self._layout()[1:], start=1):
+            words[index] = value
+        words[6] = os.getpid() if self._owner else 0
+        # Written last: attaching processes wait for it
+        words[0] = _MAGIC
+
+    def _check_header(self):
+
+        deadline = time.monotonic() + 1.0
+        while self._words[0] == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        if list(self._words[:6]) != self._layout():
+            self._words.release()
+            self._shm.close()
+            raise ValueError(f"Shared memory segment '{self.name}' has a different metrics layout")
+
+    def _slot_base(self, slot):
+
+        return _HEADER_WORDS + slot * self._slot_words
+
+    @contextmanager
+    def _segment_lock(self):
+
+        if fcntl is None:
+            yield
+            return
+        path = os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+        with open(path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _ensure_slot(self):
+
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._slot
+
+        with _claim_lock:
+            if self._pid == pid:
+                return self._slot
+            # New process (or forked child): nothing from the parent's slot applies
+            self._lock = threading.Lock()
+            self._counter_offsets = {}
+            self._histogram_offsets = {}
+            self._slot = self._claim_slot(pid)
+            self._pid = pid
+            if self._slot is None:
+                # Degraded: this process's updates are dropped and counted in stats()
+                logger.warning(f"No free worker slots in shared metrics segment '{self.name}': "
+                               f"metrics from process {pid} will be dropped")
+            # multiprocessing children skip atexit; retire the slot from their exit hooks too
+            util.Finalize(self, self.close, exitpriority=10)
+        return self._slot
+
+    def _claim_slot(self, pid):
+
+        words = self._words
+        with self._segment_lock():
+            for slot in range(1, self.max_workers + 1):
+                base = self._slot_base(slot)
+                slot_pid = words[base]
+                if slot_pid and slot_pid != pid and _pid_alive(slot_pid):
+                    continue
+                if slot_pid:
+                    self._retire_slot(slot)
+                words[base + 1] = 0
+                words[base + 2] = 0
+                words[base] = pid
+                return slot
+
+        return None
+
+    def _iter_entries(self, slot):
+
+        words = self._words
+        buf = self._shm.buf
+        base = self._slot_base(slot)
+        for index in range(min(words[base + 1], self.max_counters)):
+            offset = base + _SLOT_HEADER_WORDS + index * self._counter_words
+            key = bytes(buf[offset * 8:(offset + self.key_words) * 8]).rstrip(b"\0")
+            yield "counter", key, offset + self.key_words
+        for index in range(min(words[base + 2], self.max_histograms)):
+            offset = base + self._histograms_start + index * self._histogram_words
+            key = bytes(buf[offset * 8:(offset + self.key_words) * 8]).rstrip(b"\0")
+            yield "histogram", key, offset + self.key_words
+
+    def _add_entry(self, slot, kind, key):
+
+        # Caller holds the lock for this slot
+        words = self._words
+        base = self._slot_base(slot)
+        if kind == "counter":
+            index = words[base + 1]
+            if index >= self.max_counters:
+                return None
+            offset = base + _SLOT_HEADER_WORDS + index * self._counter_words
+            data_words = 1
+        else:
+            index = words[base + 2]
+            if index >= self.max_histograms:
+                return None
+            offset = base + self._histograms_start + index * self._histogram_words
+            data_words = _HISTOGRAM_DATA_WORDS
+
+        start = offset * 8
+        self._shm.buf[start:start + self.key_size] = key.ljust(self.key_size, b"\0")
+        data = offset + self.key_words
+        words[data:data + data_words] = memoryview(bytes(data_words * 8)).cast("Q")
+        if kind == "histogram":
+            words[data + 2] = _NO_MINIMUM
+
+        # Publish the entry only once it is fully written
+        words[base + (1 if kind == "counter" else 2)] = index + 1
+        return data
+
+    def _retire_slot(self, slot):
+        """Fold a worker slot into slot 0 and free it. Caller holds the segment lock."""
+
+        words = self._words
+        # A counter and a histogram may share a name and labels, so match on both
+        retired = {(kind, key): data for kind, key, data in self._iter_entries(0)}
+        lost = 0
+        for kind, key, data in self._iter_entries(slot):
+            target_data = retired.get((kind, key))
+            if target_data is None:
+                target_data = self._add_entry(0, kind, key)
+                if target_data is None:
+                    lost += 1
+                    continue
+                retired[(kind, key)] = target_data
+            if kind == "counter":
+                words[target_data] += words[data]
+                continue
+            words[target_data] += words[data]
+            words[target_data + 1] += words[data + 1]
+            words[target_data + 2] = min(words[target_data + 2], words[data + 2])
+            words[target_data + 3] = max(words[target_data + 3], words[data + 3])
+            for bucket in range(4, _HISTOGRAM_DATA_WORDS):
+                if words[data + bucket]:
+                    words[target_data + bucket] += words[data + bucket]
+
+        if lost:
+            logger.warning(f"Shared metrics segment '{self.name}' is full: {lost} series from a retired worker were dropped")
+
+        base = self._slot_base(slot)
+        words[base + 1] = 0
+        words[base + 2] = 0
+        words[base] = 0
+
+    def _entry(self, offsets, kind, name, labels):
+
+        key = (name, tuple(sorted(labels.items())))
+        data = offsets.get(key)
+        if data is not None:
+            return data
+
+        encoded = dumps([name, [[label, str(value)] for label, value in key[1]]])
+        with self._lock:
+            data = offsets.get(key)
+            if data is None and len(encoded) <= self.key_size:
+                data = self._add_entry(self._slot, kind, encoded)
+            if data is None:
+                self._dropped_updates += 1
+                return None
+            offsets[key] = data
+        return data
+
+    def _drop_update(self):
+
+        with self._lock:
+            self._dropped_updates += 1
+
+    def increment(self, name, amount=1, **labels):
+
+        if self._closed:
+            return
+        if self._ensure_slot() is None:
+            self._drop_update()
+            return
+        data = self._entry(self._counter_offsets, "counter", name, labels)
+        if data is not None:
+            with self._lock:
+                self._words[data] += amount
+
+    def observe(self, name, value_ms, **labels):
+
+        if self._closed:
+            return
+        if self._ensure_slot() is None:
+            self._drop_update()
+            return
+        data = self._entry(self._histogram_offsets, "histogram", name, labels)
+        if data is None:
+            return
+
+        value_us = int(value_ms * 1000) if value_ms > 0 else 0
+        words = self._words
+        with self._lock:
+            words[data] += 1
+            words[data + 1] += value_us
+            if value_us < words[data + 2]:
+                words[data + 2] = value_us
+            if value_us > words[data + 3]:
+                words[data + 3] = value_us
+            words[data + 4 + bucket_index(value_us)] += 1
+
+    def _collect(self):
+
+        words = self._words
+        counters = {}
+        histograms = {}
+        # The segment lock keeps a retiring worker from being counted both in
+        # its own slot and in slot 0
+        with self._segment_lock():
+            for slot in range(self.max_workers + 1):
+                if slot and not words[self._slot_base(slot)]:
+                    continue
+                for kind, key, data in self._iter_entries(slot):
+                    if kind == "counter":
+                        counters[key] = counters.get(key, 0) + words[data]
+                        continue
+                    count, sum_us, min_us, max_us = words[data:data + 4].tolist()
+                    counts = words[data + 4:data + _HISTOGRAM_DATA_WORDS].tolist()
+                    total = histograms.get(key)
+                    if total is None:
+                        histograms[key] = [counts, count, sum_us, min_us, max_us]
+                    else:
+                        total[0] = [a + b for a, b in zip(total[0], counts)]
+                        total[1] += count
+                        total[2] += sum_us
+                        total[3] = min(total[3], min_us)
+                        total[4] = max(total[4], max_us)
+
+        def decode(key):
+            name, labels = loads(key.decode("utf-8"))
+            return name, tuple((label, value) for label, value in labels)
+
+        counter_rows = [(*decode(key), value) for key, value in counters.items()]
+        histogram_rows = []
+        for key, (counts, count, sum_us, min_us, max_us) in histograms.items():
+            name, labels = decode(key)
+            histogram_rows.append((name, labels, counts, count, sum_us, None if min_us == _NO_MINIMUM else min_us, max_us))
+        return counter_rows, histogram_rows
+
+    def stats(self):
+
+        words = self._words
+        live = [slot for slot in range(1, self.max_workers + 1) if words[self._slot_base(slot)]]
+        return {
+            "segment": self.name,
+            "size_bytes": self._shm.size,
+            "worker_slot": self._slot if self._pid == os.getpid() else None,
+            "degraded": self._pid == os.getpid() and self._slot is None and not self._closed,
+            "live_workers": len(live),
+            "max_workers": self.max_workers,
+            "dropped_updates": self._dropped_updates,
+        }
+
+    def close(self):
+        """Retire this process's slot and detach, unlinking the segment if this process is responsible for it."""
+
+        if self._closed:
+            return
+        self._closed = True
+
+        words = self._words
+        unlink = False
+        if self._pid == os.getpid() and self._slot is not None:
+            with self._segment_lock():
+                self._retire_slot(self._slot)
+                # Without an owning parent, the last worker out removes the segment
+                owner_pid = words[6]
+                if not owner_pid or not _pid_alive(owner_pid):
+                    unlink = not any(words[self._slot_base(slot)] for slot in range(1, self.max_workers + 1))
+            self._slot = None
+        if self._owner and words[6] == os.getpid():
+            unlink = True
+
+        words.release()
+        self._shm.close()
+        if unlink:
+            self.unlink()
+
+    def unlink(self):
+
+        try:
+            shm = shared_memory.SharedMemory(self.name)
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
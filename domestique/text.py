@@ -18,8 +18,14 @@ import base64
 import string
 import random
 import re
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
 
 from . import _persistent
+from .codec import encode_int
 
 
 logger = logging.getLogger(__name__)
@@ -28,31 +34,171 @@ logger = logging.getLogger(__name__)
 def base36_encode(number, alphabet=string.ascii_lowercase + string.digits):
     """Converts an integer to a base36 string."""
 
-    base36 = ''
+    return encode_int(number, alphabet)
 
-    while number:
-        number, i = divmod(number, 36)
-        base36 = alphabet[i] + base36
 
-    return base36 or alphabet[0]
+# Container types whose str() output can be rendered piecewise in bounded mode
+_BOUNDED_TYPES = (dict, list, tuple, set, frozenset)
 
+# Leaf values that bounded mode clips before repr(), like plain strings
+_CLIPPED_LEAF_TYPES = (str, bytes, bytearray)
 
-def truncate_string(obj, max_length):
+# In bounded mode, non-string inputs to tidy_and_truncate_string are rendered
+# to this multiple of max_length before tags are stripped
+_TIDY_RENDER_FACTOR = 4
+_TIDY_RENDER_MINIMUM = 256
 
-    if obj is None:
-        return ""
-    string_repr = str(obj)
-    if len(string_repr) > max_length:
-        return string_repr[:max_length] + '[...]'
+_TAG_PATTERN = re.compile('<[^<]+?>')
 
-    return string_repr
+# Defaults for iter_tidy_string
+_STREAM_CHUNK_SIZE = 65536
+_STREAM_MAX_TAG_LENGTH = 65536
+
+# Defaults for tidy_and_truncate_strings
+_BATCH_CHUNK_SIZE = 1000
+_BATCH_MODES = ("auto", "inline", "process")
+
+
+def _iter_repr_pieces(obj, leaf_limit, seen):
+    """
+    Yield the repr() of `obj` in pieces, reprlib-style, so a caller can stop
+    once it has enough characters. Long strings are clipped to `leaf_limit`.
+    """
+
+    obj_type = type(obj)
+
+    if obj_type is str:
+        if len(obj) > leaf_limit:
+            # Drop the closing quote: the caller truncates this anyway
+            yield repr(obj[:leaf_limit])[:-1]
+        else:
+            yield repr(obj)
+        return
+
+    if isinstance(obj, _CLIPPED_LEAF_TYPES) and len(obj) > leaf_limit:
+        # Slicing gives a plain str/bytes/bytearray; the clipped repr is
+        # already longer than the caller keeps
+        yield repr(obj[:leaf_limit])
+        return
+
+    if obj_type not in _BOUNDED_TYPES:
+        yield repr(obj)
+        return
+
+    if id(obj) in seen:
+        yield {dict: '{...}', list: '[...]', tuple: '(...)'}.get(obj_type, '...')
+        return
+
+    if obj_type is dict:
+        opener, closer = '{', '}'
+        items = obj.items()
+    elif obj_type is list:
+        opener, closer = '[', ']'
+        items = obj
+    elif obj_type is tuple:
+        opener, closer = '(', ',)' if len(obj) == 1 else ')'
+        items = obj
+    elif not obj:
+        yield f"{obj_type.__name__}()"
+        return
+    elif obj_type is set:
+        opener, closer = '{', '}'
+        items = obj
+    else:
+        opener, closer = 'frozenset({', '})'
+        items = obj
+
+    seen.add(id(obj))
+    yield opener
+    first = True
+    for item in items:
+        if not first:
+            yield ', '
+        first = False
+        if obj_type is dict:
+            key, value = item
+            yield from _iter_repr_pieces(key, leaf_limit, seen)
+            yield ': '
+            yield from _iter_repr_pieces(value, leaf_limit, seen)
+        else:
+            yield from _iter_repr_pieces(item, leaf_limit, seen)
+    yield closer
+    seen.discard(id(obj))
 
 
-def truncate_string(obj, max_length):
+def _bounded_str(obj, limit):
+    """
+    Return str(obj), but for built-in containers render at most `limit` + 1
+    characters, which is enough to tell whether truncation is needed.
+    """
+
+    if type(obj) not in _BOUNDED_TYPES:
+        if isinstance(obj, (bytes, bytearray)) and len(obj) > limit:
+            return repr(obj[:limit + 1])[:limit + 1]
+        return str(obj)
+
+    pieces = []
+    total = 0
+    for piece in _iter_repr_pieces(obj, limit + 1, set()):
+        pieces.append(piece)
+        total += len(piece)
+        if total > limit:
+            break
+
+    return "".join(pieces)[:limit + 1]
+
+
+def _tidy_prefix(text, limit):
+    """
+    Apply tidy_string() to `text` in one pass, stopping once more than
+    `limit` characters of output exist. Returns the first `limit` characters
+    of the tidied text and whether any tidied text follows them.
+    """
+
+    out = []
+    emitted = 0
+    pos = 0
+    end = len(text)
+    find = text.find
+    match_tag = _TAG_PATTERN.match
+
+    while pos < end and emitted <= limit:
+        need = limit + 1 - emitted
+        lt = find('<', pos, pos + need)
+        if lt == -1:
+            chunk = text[pos:pos + need]
+            out.append(chunk)
+            emitted += len(chunk)
+            break
+        out.append(text[pos:lt])
+        emitted += lt - pos
+        tag = match_tag(text, lt)
+        if tag:
+            pos = tag.end()
+        else:
+            out.append('<')
+            emitted += 1
+            pos = lt + 1
+
+    tidied = "".join(out).replace('\n', '/')
+
+    return tidied[:limit], len(tidied) > limit
+
+
+def truncate_string(obj, max_length, bounded=False):
+    """
+    Return str(obj), truncated to `max_length` characters plus '[...]'.
+
+    With bounded=True, dicts, lists, tuples and sets are rendered piecewise
+    and only as far as needed, so the cost does not depend on their size.
+    Long strings nested in containers are clipped with their repr() quote
+    style chosen from the clipped part, so bounded output may differ from
+    str(obj) in that one character.
+    """
 
     if obj is None:
         return ""
-    string_repr = str(obj)
+    string_repr = _bounded_str(obj, max_length) if bounded else str(obj)
     if len(string_repr) > max_length:
         return string_repr[:max_length] + '[...]'
 
@@ -65,14 +211,178 @@ def tidy_string(input_string):
         return ""
     string_repr = str(input_string)
     tidied_string = string_repr.replace('\n', '/')
-    tidied_string = re.sub('<[^<]+?>', '', tidied_string)
+    tidied_string = _TAG_PATTERN.sub('', tidied_string)
 
     return tidied_string
 
 
-def tidy_and_truncate_string(input_string, max_length):
+def iter_tidy_string(source, chunk_size=_STREAM_CHUNK_SIZE, max_tag_length=_STREAM_MAX_TAG_LENGTH):
+    """
+    Streaming tidy_string(): yield tidied text incrementally from a string or
+    an iterable of text chunks (e.g. reads from a file opened in text mode).
+
+    Each chunk is tidied as it arrives; the only state carried between
+    chunks is a tag that has been opened but not yet closed, so tags split
+    across chunk boundaries are still removed. Output matches tidy_string()
+    except that a '<' not closed within `max_tag_length` characters is
+    passed through as text, which keeps memory flat on unbounded input.
+
+    Args:
+        source: A string, or an iterable of strings.
+        chunk_size: Size of the pieces a string source is processed in.
+        max_tag_length: Longest tag (including '<' and '>') that is removed.
+    """
+
+    if isinstance(source, str):
+        if not source:
+            return
+        text = source
+        source = (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
 
-    tidied_string = tidy_string(input_string)
-    tidied_string = truncate_string(tidied_string, max_length)
+    # State carried between chunks: the text of a tag opened but not yet closed
+    pending = ""
+    sub_tags = _TAG_PATTERN.sub
+
+    for chunk in source:
+        if not chunk:
+            continue
+        if not isinstance(chunk, str):
+            raise TypeError("iter_tidy_string requires str chunks")
+
+        buffer = pending + chunk if pending else chunk
+        pending = ""
+
+        # Tags cannot contain '<', so everything before the last '<' tidies
+        # the same whatever follows. The last '<' is settled once a '>' after
+        # its first content character has arrived.
+        lt = buffer.rfind('<')
+        if lt != -1 and buffer.find('>', lt + 2) == -1:
+            if len(buffer) - lt <= max_tag_length:
+                buffer, pending = buffer[:lt], buffer[lt:]
+
+        if buffer:
+            yield sub_tags('', buffer).replace('\n', '/')
+
+    if pending:
+        yield pending.replace('\n', '/')
+
+
+def tidy_and_truncate_string(input_string, max_length, bounded=False):
+    """
+    Return tidy_string(input_string) truncated as for truncate_string().
+
+    With bounded=True the tidy and truncate happen in one pass that stops
+    once `max_length` characters have been produced, so the cost does not
+    depend on the input size. Non-string inputs are rendered (as for
+    truncate_string(bounded=True)) to a few multiples of `max_length` before
+    tidying; if that rendering was cut short the result is marked '[...]'.
+    """
+
+    if not bounded:
+        tidied_string = tidy_string(input_string)
+        tidied_string = truncate_string(tidied_string, max_length)
+        return tidied_string
+
+    if not input_string:
+        return ""
+
+    if isinstance(input_string, str):
+        text = input_string
+        cut = False
+    else:
+        render_limit = max(max_length * _TIDY_RENDER_FACTOR, _TIDY_RENDER_MINIMUM)
+        text = _bounded_str(input_string, render_limit)
+        cut = len(text) > render_limit
+        text = text[:render_limit]
+
+    tidied_string, more = _tidy_prefix(text, max_length)
+    if more or cut:
+        return tidied_string + '[...]'
 
     return tidied_string
+
+
+def _tidy_and_truncate_chunk(chunk, max_length, bounded):
+
+    return [tidy_and_truncate_string(item, max_length, bounded=bounded) for item in chunk]
+
+
+def tidy_and_truncate_strings(
+    input_strings,
+    max_length,
+    bounded=False,
+    chunk_size=_BATCH_CHUNK_SIZE,
+    workers=None,
+    mode="auto",
+    stats=None,
+):
+    """
+    Apply tidy_and_truncate_string() to every item of an iterable, yielding
+    results in input order.
+
+    Items are read lazily in chunks of `chunk_size`, and only a bounded
+    number of chunks (two per worker) are in flight at once, so memory use
+    does not grow with the size of the input.
+
+    Args:
+        input_strings: Iterable of values to tidy and truncate.
+        max_length, bounded: As for tidy_and_truncate_string().
+        chunk_size: Number of items sent to a worker at a time.
+        workers: Process pool size; defaults to os.cpu_count().
+        mode: "inline" to run in this process, "process" to use a process
+            pool, or "auto" to use a pool only when the input spans more
+            than one chunk and more than one worker is available.
+        stats: Optional dict, updated as results are yielded with "items",
+            "chunks", "mode", "workers", "elapsed_seconds" and
+            "items_per_second", for tuning worker counts and chunk sizes.
+    """
+
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    if mode not in _BATCH_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(_BATCH_MODES)}")
+
+    workers = workers or os.cpu_count() or 1
+    iterator = iter(input_strings)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+
+    if mode == "auto":
+        mode = "process" if second is not None and workers > 1 else "inline"
+
+    if stats is None:
+        stats = {}
+    stats.update({"items": 0, "chunks": 0, "mode": mode, "workers": workers if mode == "process" else 1})
+    start = time.perf_counter()
+
+    def record(results):
+        stats["items"] += len(results)
+        stats["chunks"] += 1
+        elapsed = time.perf_counter() - start
+        stats["elapsed_seconds"] = elapsed
+        stats["items_per_second"] = stats["items"] / elapsed if elapsed > 0 else 0.0
+        return results
+
+    all_chunks = chain([first] if second is None else [first, second], chunks)
+
+    if mode == "inline":
+        for chunk in all_chunks:
+            yield from record(_tidy_and_truncate_chunk(chunk, max_length, bounded))
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    in_flight = deque()
+    try:
+        for chunk in all_chunks:
+            in_flight.append(pool.submit(_tidy_and_truncate_chunk, chunk, max_length, bounded))
+            if len(in_flight) >= workers * 2:
+                yield from record(in_flight.popleft().result())
+        while in_flight:
+            yield from record(in_flight.popleft().result())
+    finally:
+        # If the generator is closed early, drop queued chunks rather than finishing them
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -15,6 +15,7 @@
 import logging
 import inspect
 import enum
+import re
 
 from .logging import get_calling_method_text, get_calling_method_name_quick
 
@@ -28,6 +29,176 @@ class NoiseLevel(enum.Enum):
     INFO = 2
 
 
+# Logging level for each noise level; SILENT logs nothing
+_NOISE_LOG_LEVELS = {
+    NoiseLevel.SILENT: None,
+    NoiseLevel.INFO: logging.INFO,
+    NoiseLevel.DEBUG: logging.DEBUG,
+}
+
+
+class Field:
+    """
+    Declaration of one field in a Schema.
+
+    Args:
+        type: A type or tuple of types the value must be an instance of.
+            bool values are not accepted for int/float unless bool is listed.
+        required: If True, the field must be present and not None.
+        min, max: Inclusive bounds for the value.
+        min_length, max_length: Inclusive bounds for len(value).
+        pattern: Regular expression the (string) value must match in full.
+        choices: Collection of allowed values.
+    """
+
+    def __init__(self, type=None, required=True, min=None, max=None, min_length=None, max_length=None, pattern=None, choices=None):
+
+        self.type = type
+        self.required = required
+        self.min = min
+        self.max = max
+        self.min_length = min_length
+        self.max_length = max_length
+        self.pattern = pattern
+        self.choices = choices
+
+
+def _compile_field(name, field):
+
+    checks = []
+
+    if field.type is not None:
+        types = field.type if isinstance(field.type, tuple) else (field.type,)
+        type_names = "/".join(t.__name__ for t in types)
+        reject_bool = bool not in types and any(t in (int, float) for t in types)
+        def check_type(value):
+            if not isinstance(value, types) or (reject_bool and isinstance(value, bool)):
+                return f"Invalid type for {name}: expected {type_names}"
+        checks.append(check_type)
+
+    if field.min is not None:
+        minimum = field.min
+        def check_min(value):
+            if value < minimum:
+                return f"Value for {name} must be >= {minimum}"
+        checks.append(check_min)
+
+    if field.max is not None:
+        maximum = field.max
+        def check_max(value):
+            if value > maximum:
+                return f"Value for {name} must be <= {maximum}"
+        checks.append(check_max)
+
+    if field.min_length is not None:
+        min_length = field.min_length
+        def check_min_length(value):
+            if len(value) < min_length:
+                return f"Length of {name} must be >= {min_length}"
+        checks.append(check_min_length)
+
+    if field.max_length is not None:
+        max_length = field.max_length
+        def check_max_length(value):
+            if len(value) > max_length:
+                return f"Length of {name} must be <= {max_length}"
+        checks.append(check_max_length)
+
+    if field.pattern is not None:
+        fullmatch = re.compile(field.pattern).fullmatch
+        def check_pattern(value):
+            if not isinstance(value, str) or fullmatch(value) is None:
+                return f"Value for {name} does not match the required pattern"
+        checks.append(check_pattern)
+
+    if field.choices is not None:
+        choices = frozenset(field.choices)
+        def check_choices(value):
+            if value not in choices:
+                return f"Value for {name} must be one of: {', '.join(sorted(map(str, choices)))}"
+        checks.append(check_choices)
+
+    return tuple(checks)
+
+
+class Schema:
+    """
+    A set of Field declarations compiled once into per-field check
+    functions, for reuse across requests.
+
+    Args:
+        fields: Mapping of field name to Field.
+        allow_extra: If False, values for undeclared fields are errors.
+    """
+
+    def __init__(self, fields, allow_extra=True):
+
+        if not fields:
+            raise ValueError("Schema requires at least one field")
+
+        self.fields = dict(fields)
+        self.allow_extra = allow_extra
+        self.required_keys = [name for name, field in self.fields.items() if field.required]
+        self._compiled = tuple(
+            (name, field.required, _compile_field(name, field)) for name, field in self.fields.items()
+        )
+
+    def errors(self, values):
+        """Return a list of (field, message) for every failed check."""
+
+        errors = []
+        for name, required, checks in self._compiled:
+            value = values.get(name)
+            if value is None:
+                if required:
+                    errors.append((name, f"Missing required value: {name}"))
+                continue
+            for check in checks:
+                try:
+                    message = check(value)
+                except TypeError:
+                    # e.g. a range check on a str, or len() of an int
+                    message = f"Invalid value for {name}"
+                if message is not None:
+                    errors.append((name, message))
+                    break
+
+        if not self.allow_extra:
+            for name in values:
+                if name not in self.fields:
+                    errors.append((name, f"Unexpected value: {name}"))
+
+        return errors
+
+    def validate(self, values):
+        """Raise ValueError with the first failure, if any."""
+
+        errors = self.errors(values)
+        if errors:
+            raise ValueError(errors[0][1])
+
+    def validate_many(self, records):
+        """
+        Check every record of a batch without stopping at the first failure.
+
+        Returns a report dict with "total", "valid" and "invalid" counts and
+        "errors", a list of {"row", "field", "error"} entries where "row" is
+        the index of the record in `records`.
+        """
+
+        report_errors = []
+        total = 0
+        invalid = 0
+        for row, values in enumerate(records):
+            total += 1
+            errors = self.errors(values) if isinstance(values, dict) else [(None, "Record must be a dictionary")]
+            if errors:
+                invalid += 1
+                report_errors.extend({"row": row, "field": field, "error": error} for field, error in errors)
+
+        return {"total": total, "valid": total - invalid, "invalid": invalid, "errors": report_errors}
+
+
 class Validator:
 
     def __init__(self, calling_method_text=None, logging_identifiers=[], default_noise_level=NoiseLevel.DEBUG):
@@ -56,23 +227,33 @@ class Validator:
         return " ~ ".join(self.logging_identifiers)
 
 
-    def check(self, required_keys=[], noise_level=None, **values):
+    def _log_level(self, noise_level):
 
         if noise_level is None:
             noise_level = self.default_noise_level
 
-        log_func = {
-            NoiseLevel.SILENT: lambda *args, **kwargs: None,
-            NoiseLevel.INFO: self.logger.info,
-            NoiseLevel.DEBUG: self.logger.debug
-        }.get(noise_level, self.logger.debug)
+        level = _NOISE_LOG_LEVELS.get(noise_level, logging.DEBUG)
+        if level is None or not self.logger.isEnabledFor(level):
+            return None
+        return level
+
+
+    def _log_validation_start(self, level):
 
         logging_id_string = self.get_logging_id_string()
         validation_message = f"Validating parameters for: {self.calling_method_text}"
         if logging_id_string:
             validation_message += f" -- [{logging_id_string}]"
 
-        log_func(validation_message)
+        self.logger.log(level, validation_message)
+
+
+    def check(self, required_keys=[], noise_level=None, **values):
+
+        # Messages are only built when the target level is enabled
+        level = self._log_level(noise_level)
+        if level is not None:
+            self._log_validation_start(level)
         method_name = self.calling_method_text.split('.')[-1]
 
         # Check and log required values
@@ -81,12 +262,46 @@ class Validator:
                 message = f"Missing required value: {key}"
                 self.logger.error(f"{self.calling_method_text}: {message}")
                 raise ValueError(message)
-            log_func(f"{method_name}: *{key} = {values[key]}")
+            if level is not None:
+                self.logger.log(level, f"{method_name}: *{key} = {values[key]}")
 
         # Log optional values
-        for key, value in values.items():
-            if key not in required_keys:
-                log_func(f"{method_name}: {key} = {value}")
+        if level is not None:
+            for key, value in values.items():
+                if key not in required_keys:
+                    self.logger.log(level, f"{method_name}: {key} = {value}")
+
+
+    def check_schema(self, schema, noise_level=None, **values):
+        """Validate values against a compiled Schema, logging as check() does."""
+
+        level = self._log_level(noise_level)
+        if level is not None:
+            self._log_validation_start(level)
+
+        errors = schema.errors(values)
+        if errors:
+            message = errors[0][1]
+            self.logger.error(f"{self.calling_method_text}: {message}")
+            raise ValueError(message)
+
+        if level is not None:
+            method_name = self.calling_method_text.split('.')[-1]
+            for key, value in values.items():
+                marker = "*" if key in schema.fields and schema.fields[key].required else ""
+                self.logger.log(level, f"{method_name}: {marker}{key} = {value}")
+
+
+    def validate_many(self, schema, records, noise_level=None):
+        """Validate a batch of records against a Schema; see Schema.validate_many()."""
+
+        report = schema.validate_many(records)
+
+        level = self._log_level(noise_level)
+        if level is not None:
+            self.logger.log(level, f"{self.calling_method_text}: validated {report['total']} records, {report['invalid']} invalid")
+
+        return report
 
 
     def check_all(self, noise_level=None, **values):
@@ -0,0 +1,98 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+
+import pytest
+
+flask = pytest.importorskip("flask")
+from flask.json.provider import DefaultJSONProvider
+
+from domestique.flask.response import ResponseWrapper
+from domestique.flask.session import Session
+from domestique.logging import get_request_context
+
+
+class _ComplexJSONProvider(DefaultJSONProvider):
+
+    mimetype = "application/vnd.example+json"
+
+    @staticmethod
+    def default(o):
+
+        if isinstance(o, complex):
+            return [o.real, o.imag]
+        return DefaultJSONProvider.default(o)
+
+
+def _generate(app, data, serializer=None):
+
+    with app.test_request_context("/things"):
+        wrapper = ResponseWrapper(flask.request, "client", "handler", serializer=serializer)
+        return wrapper.generate_response_with_data(data, 201)
+
+
+def test_custom_json_provider_is_used():
+
+    app = flask.Flask(__name__)
+    app.json = _ComplexJSONProvider(app)
+
+    resp = _generate(app, {"value": 1 + 2j})
+
+    assert resp.status_code == 201
+    assert resp.mimetype == "application/vnd.example+json"
+    assert json.loads(resp.get_data())["value"] == [1.0, 2.0]
+
+
+def test_default_provider_settings_changed_on_app_are_used():
+
+    app = flask.Flask(__name__)
+    app.json.sort_keys = False
+
+    resp = _generate(app, {"b": 1, "a": 2})
+
+    assert resp.status_code == 201
+    assert list(json.loads(resp.get_data()))[:2] == ["b", "a"]
+
+
+def test_explicit_serializer_bypasses_app_provider():
+
+    app = flask.Flask(__name__)
+    app.json = _ComplexJSONProvider(app)
+
+    resp = _generate(app, {"a": 1}, serializer="json")
+
+    assert resp.mimetype == "application/json"
+    assert json.loads(resp.get_data())["a"] == 1
+
+
+def test_response_wrapper_leaves_request_context_unchanged():
+
+    app = flask.Flask(__name__)
+
+    _generate(app, {"a": 1})
+
+    assert get_request_context() == {}
+
+
+def test_session_sets_and_resets_request_context():
+
+    app = flask.Flask(__name__)
+
+    with app.test_request_context("/things"):
+        session = Session("client", flask.request, "handler")
+        assert get_request_context() == {"response_id": session.get_id(), "client_id": "client", "handler": "handler"}
+        session.terminate()
+
+    assert get_request_context() == {}
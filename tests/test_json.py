@@ -0,0 +1,36 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import pytest
+
+from domestique.json import get_dict_from_dict_or_json_str, loads
+
+
+@pytest.mark.parametrize("json_string, expected", [
+    ('[18446744073709551616]', [18446744073709551616]),
+    ('[-99999999999999999999999]', [-99999999999999999999999]),
+    (b'[18446744073709551616]', [18446744073709551616]),
+    ('{a: 123456789012345678901}', {"a": 123456789012345678901}),
+])
+def test_loads_keeps_big_integers_exact(json_string, expected):
+
+    value = loads(json_string, "auto")
+    assert value == expected
+    assert all(type(item) is int for item in (value.values() if isinstance(value, dict) else value))
+
+
+def test_get_dict_keeps_big_integers_exact():
+
+    value = get_dict_from_dict_or_json_str('{"id": 123456789012345678901234567890}')
+    assert value["id"] == 123456789012345678901234567890
@@ -0,0 +1,33 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from domestique import _persistent
+
+
+def test_setting_a_mutated_value_notifies_listeners():
+
+    calls = []
+    callback = lambda key, old, new: calls.append((key, new))
+    _persistent.add_listener(callback, "test_config")
+    try:
+        config = {"pool_size": 1}
+        _persistent.set_value("test_config", config)
+        config["pool_size"] = 2
+        _persistent.set_value("test_config", config)
+        _persistent.delete_value("test_config")
+        _persistent.delete_value("test_config")
+    finally:
+        _persistent.remove_listener(callback, "test_config")
+
+    assert calls == [("test_config", config), ("test_config", config), ("test_config", None)]
@@ -0,0 +1,58 @@
+# Copyright 2023-2025 David Goddard.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain a
+# copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import uuid
+
+import pytest
+
+from domestique.shared_metrics import SharedMemoryMetrics
+
+
+@pytest.fixture
+def metrics():
+
+    registry = SharedMemoryMetrics(f"domestique_test_{uuid.uuid4().hex[:12]}", create=True, max_workers=2)
+    yield registry
+    registry.close()
+
+
+def test_retire_keeps_counter_and_histogram_with_same_key_apart(metrics):
+
+    metrics.increment("dup", a="1")
+    metrics.observe("dup", 5, a="1")
+    with metrics._segment_lock():
+        metrics._retire_slot(metrics._ensure_slot())
+    metrics._pid = None
+
+    snapshot = metrics.snapshot()
+
+    assert [(c["name"], c["value"]) for c in snapshot["counters"]] == [("dup", 1)]
+    assert [(h["name"], h["count"]) for h in snapshot["histograms"]] == [("dup", 1)]
+    assert "dup" in metrics.to_prometheus()
+
+
+def test_updates_are_dropped_without_a_free_slot(metrics):
+
+    words = metrics._words
+    for slot in range(1, metrics.max_workers + 1):
+        # The parent process is alive, so these slots cannot be reclaimed
+        words[metrics._slot_base(slot)] = os.getppid()
+
+    metrics.increment("requests")
+    metrics.observe("latency", 5)
+
+    stats = metrics.stats()
+    assert stats["degraded"]
+    assert stats["dropped_updates"] == 2